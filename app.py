@@ -1,8 +1,7 @@
 import streamlit as st
-import anthropic
 
 # --- Import Infrastructure & Domain ---
-from services import DatasetManager, PromptBuilder, TaskClassifier
+from services import DatasetManager, PromptBuilder, TaskClassifier, AsyncTokenBucket, make_client, make_async_client
 from services.repository import YamlRepository, TriageService, PlanningService, ExecutionService
 from services.analytics_service import AnalyticsService
 
@@ -30,9 +29,12 @@ def get_infrastructure():
         st.error("ANTHROPIC_API_KEY not found in secrets.")
         st.stop()
 
-    client = anthropic.Anthropic(api_key=api_key)
+    client = make_client(api_key)
     prompt_builder = PromptBuilder()
-    classifier = TaskClassifier(client, prompt_builder)
+    # Budget of the lowest API tier for Haiku; raise it to match the account's actual limits
+    rate_limiter = AsyncTokenBucket(rpm=50, tpm=50_000)
+    classifier = TaskClassifier(client, prompt_builder, async_client=make_async_client(api_key),
+                                rate_limiter=rate_limiter)
 
     analytics_service = AnalyticsService(None, client, prompt_builder) # Repo is injected later
     return dataset_manager, classifier, analytics_service
@@ -1,10 +1,14 @@
+import json
+import os
+from contextlib import contextmanager
 from pathlib import Path
 import yaml
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from models.entities import (
     DatasetContent, Project, Goal
 )
+from models.dtos import DirtyHint
 
 # Setup Logger
 logger = logging.getLogger("DatasetIO")
@@ -15,6 +19,43 @@ if not logger.handlers:
     logger.addHandler(handler)
     logger.setLevel(logging.DEBUG)
 
+# libyaml bindings parse/emit ~10-20x faster than the pure-Python classes; not every PyYAML build ships them
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# Sidecar written next to dataset.yaml on every save. Validating JSON skips YAML scalar resolution
+# entirely. Its first line records the (mtime_ns, size) of the YAML it was written from, and it is
+# only trusted while the YAML still has exactly that stamp: hand edits and restores of an older
+# copy (cp -p, rsync, backups keep the old mtime) both win over it.
+JSON_CACHE_NAME = "dataset.json"
+
+
+def _yaml_stamp(yaml_file: Path) -> List[int]:
+    stat = yaml_file.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+@contextmanager
+def _atomic_write(target: Path):
+    """Write to a temp file and rename over the target: a crash or a concurrent load never sees half a file"""
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_json_cache(yaml_file: Path, body: str) -> None:
+    """Writes the sidecar for yaml_file: its stamp line, then the dataset as single-line JSON"""
+    with _atomic_write(yaml_file.with_name(JSON_CACHE_NAME)) as f:
+        f.write(json.dumps(_yaml_stamp(yaml_file)) + "\n")
+        f.write(body)
+
 
 class YamlDatasetLoader:
     def load(self, yaml_file: Path) -> DatasetContent:
@@ -24,9 +65,13 @@ class YamlDatasetLoader:
             logger.error(f"File not found: {yaml_file}")
             raise FileNotFoundError(f"File not found: {yaml_file}")
 
+        cached = self._load_json_cache(yaml_file)
+        if cached is not None:
+            return cached
+
         try:
             with open(yaml_file, 'r', encoding='utf-8') as f:
-                raw_data = yaml.safe_load(f) or {}
+                raw_data = yaml.load(f, Loader=SafeLoader) or {}
         except Exception as e:
             logger.exception("Failed to parse YAML file")
             raise e
@@ -57,11 +102,33 @@ class YamlDatasetLoader:
 
         logger.info(f"Successfully loaded {len(projects)} projects")
 
-        return DatasetContent(
+        content = DatasetContent(
             goals=goals,
             projects=projects,
             inbox_tasks=raw_data.get('inbox_tasks', [])
         )
+        # Datasets written by hand (or by an older version) get their sidecar here, so only the
+        # first load after a change pays for the YAML parse
+        try:
+            _write_json_cache(yaml_file, content.model_dump_json())
+        except OSError as e:
+            logger.warning(f"Could not write JSON cache next to {yaml_file}: {e}")
+        return content
+
+    def _load_json_cache(self, yaml_file: Path) -> Optional[DatasetContent]:
+        cache_file = yaml_file.with_name(JSON_CACHE_NAME)
+        try:
+            stamp, _, body = cache_file.read_bytes().partition(b"\n")
+            if json.loads(stamp) != _yaml_stamp(yaml_file):
+                return None
+            content = DatasetContent.model_validate_json(body)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable JSON cache {cache_file}: {e}")
+            return None
+        logger.info(f"Loaded {len(content.projects)} projects from JSON cache")
+        return content
 
     def _parse_project(self, data: Dict[str, Any], index: int = -1) -> Project:
         """
@@ -108,26 +175,58 @@ class YamlDatasetLoader:
 
 
 class YamlDatasetSaver:
-    def save(self, path: Path, content: DatasetContent) -> None:
+    def save(self, path: Path, content: DatasetContent, dirty: Optional[DirtyHint] = None,
+             project_dumps: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        project_dumps is the caller's ProjectID -> JSON-ready dict cache from its previous save.
+        With a dirty hint, projects outside it are taken from there instead of re-serialized; the
+        cache is updated in place. It belongs to whoever holds the in-memory content, never to the
+        saver, which may be shared by sessions holding different copies of the same dataset.
+        """
         path.mkdir(parents=True, exist_ok=True)
         file_path = path / "dataset.yaml"
 
         logger.info(f"Saving dataset to {file_path}")
 
-        # Sort projects by sort_order before dumping
-        # Handle None sort_order gracefully just in case
-        content.projects.sort(key=lambda p: (p.goal_id or "", getattr(p, 'sort_order', 0.0)))
-
-        # Dump using Pydantic's built-in JSON-compatible dict dumper
-        data_dict = content.model_dump(mode='json')
+        # Dump using Pydantic's built-in JSON-compatible dict dumper; projects come out sorted
+        # by goal and sort_order, while content.projects keeps its order (the caller indexes it)
+        data_dict = self._dump(content, dirty, project_dumps)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with _atomic_write(file_path) as f:
             yaml.dump(
                 data_dict,
                 f,
+                Dumper=SafeDumper,
                 default_flow_style=False,
                 sort_keys=False,
                 allow_unicode=True,
                 width=1000
             )
-        logger.info("Save complete.")
\ No newline at end of file
+        # Written after the YAML, stamped with the file it mirrors
+        _write_json_cache(file_path, json.dumps(data_dict, ensure_ascii=False, separators=(',', ':')))
+        logger.info("Save complete.")
+
+    def _dump(self, content: DatasetContent, dirty: Optional[DirtyHint],
+              cache: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Re-serializes only the projects named in the dirty hint; the rest come from the last save"""
+        if not cache or dirty is None or dirty.is_full:
+            data_dict = content.model_dump(mode='json')
+            data_dict['projects'].sort(key=lambda p: (p['goal_id'] or "", p['sort_order']))
+            if cache is not None:
+                cache.clear()
+                cache.update((p['id'], p) for p in data_dict['projects'])
+            return data_dict
+
+        projects = []
+        fresh = 0
+        for p in sorted(content.projects, key=lambda p: (p.goal_id or "", p.sort_order)):
+            dumped = None if p.id in dirty.projects else cache.get(p.id)
+            if dumped is None:
+                dumped = cache[p.id] = p.model_dump(mode='json')
+                fresh += 1
+            projects.append(dumped)
+        logger.debug(f"Partial dump: {fresh} of {len(projects)} projects re-serialized")
+
+        rest = content.model_dump(mode='json', exclude={'projects'})
+        # Keep the field order of a full dump so the YAML layout does not shift
+        return {key: projects if key == 'projects' else rest[key] for key in DatasetContent.model_fields}
\ No newline at end of file
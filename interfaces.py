@@ -1,11 +1,11 @@
 # interfaces.py
-from typing import Protocol, List, Optional, Dict, Tuple
+from typing import Protocol, List, Optional, Mapping, Tuple, Sequence
 from models.entities import TaskItem, Project, Goal, ResourceItem, ReferenceItem, ResourceType
 from services.repository import DraftItem # Needed for type hinting
 
 # --- Interface for Feature F-01: Capture & Clarify ---
 class InboxManager(Protocol):
-    def get_inbox_items(self) -> List[str]: ...
+    def get_inbox_items(self) -> Sequence[str]: ...
 
     def add_to_inbox(self, text: str) -> None: ...
     def create_draft(self, text: str, classification: 'ClassificationResult') -> DraftItem: ...
@@ -16,7 +16,7 @@ class InboxManager(Protocol):
 
 # --- Interface for Feature F-02: Organize & Review ---
 class GoalPlanner(Protocol):
-    def get_all_goals(self) -> List[Goal]: ...
+    def get_all_goals(self) -> Sequence[Goal]: ...
 
     def create_goal(self, name: str, description: str) -> Goal: ...
 
@@ -30,5 +30,6 @@ class GoalPlanner(Protocol):
 class TaskExecutor(Protocol):
     def get_next_actions(self, context_filter: Optional[str] = None) -> List[TaskItem]: ...
     def complete_item(self, item_id: str) -> None: ...
-    def get_aggregated_shopping_list(self) -> Dict[str, List[Tuple[ResourceItem, str]]]: ...
+    def set_completed(self, item_id: str, value: bool) -> bool: ...
+    def get_aggregated_shopping_list(self) -> Mapping[str, Sequence[Tuple[ResourceItem, str]]]: ...
     def toggle_resource_status(self, resource_id: str, is_acquired: bool) -> None: ...
\ No newline at end of file
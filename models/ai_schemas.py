@@ -1,5 +1,5 @@
 from typing import List, Optional, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 from dataclasses import dataclass
 from models.entities import SystemConfig
@@ -11,6 +11,10 @@ class ClassificationType(str, Enum):
     NEW_PROJECT = "new_project"
     INCUBATE = "incubate"
 
+# Spellings the model returns for the 'Unmatched' sentinel; downstream code compares exactly
+_UNMATCHED = frozenset({"Unmatched", "unmatched", "UNMATCHED", "None", "none"})
+
+
 class ClassificationResult(BaseModel):
     # --- CHAIN OF THOUGHT ---
     reasoning: str = Field(
@@ -70,6 +74,24 @@ class ClassificationResult(BaseModel):
         description="If the input contains a URL, YOU MUST COPY THE FULL URL HERE. Then add your summary/context."
     )
 
+    @field_validator('suggested_project')
+    @classmethod
+    def normalize_unmatched(cls, v: str) -> str:
+        # Set lookup covers the usual spellings; casefold only runs for names outside it
+        if v in _UNMATCHED or v.casefold() == "unmatched":
+            return "Unmatched"
+        return v
+
+class NumberedClassificationResult(ClassificationResult):
+    task_number: int = Field(
+        description="The N of the TASK_N line this result classifies."
+    )
+
+class BatchClassificationResult(BaseModel):
+    results: List[NumberedClassificationResult] = Field(
+        description="Exactly one result per TASK_N listed in the prompt."
+    )
+
 class BatchEnrichmentItem(BaseModel):
     id: str = Field(description="The ID of the item being enriched.")
 
@@ -101,6 +123,10 @@ class BatchEnrichmentResponse(BaseModel):
 @dataclass
 class ClassificationRequest:
     dataset: Any
+    available_projects: str = ""
+    existing_tags: Optional[List[str]] = None
+    # Bulk runs nobody is waiting on: go through the Message Batches API at half the cost
+    use_batch_api: bool = False
 
 @dataclass
 class ClassificationResponse:
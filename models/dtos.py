@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
 
 @dataclass
 class SingleTaskClassificationRequest:
@@ -27,3 +27,14 @@ class SaveDatasetResponse:
     message: str
     dataset_name: Optional[str] = None
     error_type: Optional[str] = None
+
+@dataclass
+class DirtyHint:
+    """What changed since the last save. projects=None means unknown scope: rewrite everything."""
+    projects: Optional[Set[str]] = field(default_factory=set)
+    inbox: bool = False
+    goals: bool = False
+
+    @property
+    def is_full(self) -> bool:
+        return self.projects is None
@@ -1,6 +1,7 @@
 from typing import List, Optional, Union, Literal, Annotated
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
+import sys
 import uuid
 from datetime import datetime, date
 
@@ -101,6 +102,14 @@ class SystemConfig:
     # Default fallback tags
     DEFAULT_TAGS: List[str] = TagKnowledgeBase.get_all_tags()
 
+    # Output budget for one ClassificationResult (reasoning + metadata JSON runs a few hundred tokens)
+    CLASSIFICATION_MAX_TOKENS: int = 1024
+    # Ceiling for one multi-item call: the SDK refuses non-streaming requests whose max_tokens could
+    # run past its 10-minute limit (~21k tokens), so classify_many sizes its chunks to stay below this
+    CLASSIFICATION_CHUNK_MAX_TOKENS: int = 16384
+    CLASSIFICATION_MODEL: str = "claude-haiku-4-5"
+    CLASSIFICATION_BETAS: List[str] = ["structured-outputs-2025-11-13"]
+
 # --- ENUMS ---
 class ProjectStatus(str, Enum):
     ACTIVE = "active"
@@ -118,6 +127,11 @@ class ResourceType(str, Enum):
     TO_GATHER = "to_gather"
 
 
+def intern_tags(tags: List[str]) -> List[str]:
+    """Interned copies of tags, so set/dict/== checks on them hit the pointer fast path"""
+    return [sys.intern(t) for t in tags]
+
+
 # --- ABSTRACT BASE & CONCRETE ITEMS ---
 
 class ProjectItem(BaseModel):
@@ -128,6 +142,12 @@ class ProjectItem(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     tags: List[str] = Field(default_factory=list)
 
+    @field_validator('tags')
+    @classmethod
+    def intern_tag_values(cls, v: List[str]) -> List[str]:
+        # Runs on every construction path: AI drafts, manual entry and YAML load
+        return intern_tags(v)
+
 
 class TaskItem(ProjectItem):
     kind: Literal["task"] = "task"
@@ -169,6 +189,17 @@ class Project(BaseModel):
     tags: List[str] = Field(default_factory=list)
     items: List[ProjectItemUnion] = Field(default_factory=list)
 
+    @field_validator('name')
+    @classmethod
+    def intern_name(cls, v: str) -> str:
+        # Key of the repository's name index and repeated in every context prompt
+        return sys.intern(v)
+
+    @field_validator('tags')
+    @classmethod
+    def intern_tag_values(cls, v: List[str]) -> List[str]:
+        return intern_tags(v)
+
 
 class Goal(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -1,11 +1,15 @@
-from .services import DatasetManager, PromptBuilder, TaskClassifier
+from .services import DatasetManager, PromptBuilder, TaskClassifier, make_client, make_async_client
 from .commands import SaveDatasetCommand
 from .projectors import DatasetProjector
+from .rate_limit import AsyncTokenBucket
 
 __all__ = [
     'DatasetManager', 
     'PromptBuilder', 
     'TaskClassifier',
+    'make_client',
+    'make_async_client',
     'SaveDatasetCommand',
-    'DatasetProjector'
+    'DatasetProjector',
+    'AsyncTokenBucket',
 ]
@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
-from models.entities import TaskItem, ProjectStatus
+from models.entities import ProjectStatus
 from models.ai_schemas import SmartFilterResult
 from services.repository import YamlRepository
 from services.services import PromptBuilder
@@ -38,7 +38,7 @@ class AnalyticsService:
                 hierarchy_lines.append(f"   Description: {goal.description}")
 
             # Find projects for this goal
-            goal_projects = [p for p in self.repo.data.projects if p.goal_id == goal.id and p.status == "active"]
+            goal_projects = [p for p in self.repo.data.projects if p.goal_id == goal.id and p.status is ProjectStatus.ACTIVE]
 
             if not goal_projects:
                 hierarchy_lines.append("   (No active projects)")
@@ -49,7 +49,7 @@ class AnalyticsService:
             hierarchy_lines.append("")  # Spacer
 
         # B. Process Orphaned Projects (Maintenance/Misc)
-        orphaned_projects = [p for p in self.repo.data.projects if not p.goal_id and p.status == "active"]
+        orphaned_projects = [p for p in self.repo.data.projects if not p.goal_id and p.status is ProjectStatus.ACTIVE]
         if orphaned_projects:
             hierarchy_lines.append("NO GOAL (Maintenance/Misc):")
             for proj in orphaned_projects:
@@ -95,8 +95,7 @@ class AnalyticsService:
 
     def _append_project_tasks(self, project, lines, candidate_map, indent):
         """Helper to format tasks and populate the map"""
-        # Filter for active TaskItems
-        tasks = [i for i in project.items if isinstance(i, TaskItem) and not i.is_completed]
+        tasks = self.repo.get_scan_index().open_tasks_by_project.get(project.id, ())
 
         if not tasks:
             return
@@ -124,7 +123,7 @@ class AnalyticsService:
         
         # Sum up durations of incomplete tasks
         total_minutes = 0
-        incomplete_tasks = [item for item in project.items if isinstance(item, TaskItem) and not item.is_completed]
+        incomplete_tasks = self.repo.get_scan_index().open_tasks_by_project.get(project.id, ())
         
         for task in incomplete_tasks:
             duration_str = task.duration.lower()
@@ -184,7 +183,7 @@ class AnalyticsService:
         
         for project in projects_to_review:
             for item in project.items:
-                if isinstance(item, TaskItem) and item.is_completed and item.completed_at:
+                if item.kind == 'task' and item.is_completed and item.completed_at:
                     # --- ROBUST DATE PARSING ---
                     completed_dt = item.completed_at
                     if isinstance(completed_dt, str):
@@ -213,7 +212,7 @@ class AnalyticsService:
         
         goals_summary = ""
         if goal_id:
-            goal = next((g for g in self.repo.data.goals if g.id == goal_id), None)
+            goal = self.repo.find_goal(goal_id)
             if goal:
                 goals_summary = f"\n\nGoal: {goal.name}\n{goal.description}"
         
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """
+    Self-pacing for concurrent API calls against a per-minute budget of requests and tokens.
+    Both buckets refill continuously; acquire() waits until one request and the estimated
+    tokens are available, so a fan-out stays under the limit instead of collecting 429s.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        # asyncio.Lock binds to the loop it first waits on; callers outside TaskClassifier's
+        # background loop (asyncio.run in scripts/tests) get a lock per loop (the budget is shared)
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    async def acquire(self, est_tokens: int = 0) -> None:
+        # A single call larger than the whole bucket would otherwise wait forever
+        est_tokens = min(est_tokens, self.tpm)
+        async with self._get_lock():  # Waiters are served in arrival order
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= est_tokens:
+                    self._requests -= 1
+                    self._tokens -= est_tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (est_tokens - self._tokens) * 60 / self.tpm,
+                ))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
@@ -1,5 +1,11 @@
-from typing import List, Optional, Tuple, Dict, Union
-from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple, Dict, Union, Sequence, ClassVar, Callable, Mapping
+from dataclasses import dataclass, field
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import chain
+from operator import attrgetter
+from types import MappingProxyType
+import io
 import uuid
 import logging
 
@@ -7,16 +13,17 @@ import logging
 from models.entities import (
     DatasetContent, Project, Goal,
     TaskItem, ResourceItem, ReferenceItem, ProjectItem,
-    ProjectStatus, ResourceType
+    ProjectStatus, ResourceType, intern_tags
 )
 from models.ai_schemas import ClassificationResult, ClassificationType
+from models.dtos import DirtyHint
 from services.services import DatasetManager
 import logging
 
 logger = logging.getLogger("Repository")
 
 # --- THE PROPOSAL OBJECT (Buffer) ---
-@dataclass
+@dataclass(slots=True)
 class DraftItem:
     """
     Represents an item that has been proposed by AI but not yet
@@ -29,43 +36,185 @@ class DraftItem:
         """Factory method to convert the draft into a concrete Entity"""
         kind = self.classification.classification_type
         name = self.classification.refined_text or self.source_text
-        tags = self.classification.extracted_tags
-
-        notes = self.classification.notes
-        duration = self.classification.estimated_duration or "unknown"
 
         logger.debug(f"Converting DraftItem to Entity. Kind: {kind}, Name: {name}")
 
-        if kind == ClassificationType.INCUBATE:
-            return TaskItem(
-                name=name,
-                tags=["someday"] + tags,
-                duration="unknown",
-                notes=f"Incubated from Triage. {notes}".strip()
-            )
-        elif kind == ClassificationType.SHOPPING:
-            return ResourceItem(
-                name=name,
-                store=self.classification.suggested_store or "General",
-                cost_estimate=self.classification.cost_estimate,
-                tags=tags
+        # One hash probe instead of an if/elif chain of enum comparisons
+        return self._FACTORIES.get(kind, DraftItem._make_task)(self, name)
+
+    def _make_incubate(self, name: str) -> TaskItem:
+        return TaskItem(
+            name=name,
+            tags=["someday"] + self.classification.extracted_tags,
+            duration="unknown",
+            notes=f"Incubated from Triage. {self.classification.notes}".strip()
+        )
+
+    def _make_shopping(self, name: str) -> ResourceItem:
+        return ResourceItem(
+            name=name,
+            store=self.classification.suggested_store or "General",
+            cost_estimate=self.classification.cost_estimate,
+            tags=self.classification.extracted_tags
+        )
+
+    def _make_reference(self, name: str) -> ReferenceItem:
+        notes = self.classification.notes
+        return ReferenceItem(
+            name=name,
+            content=notes if notes else self.source_text,
+            tags=self.classification.extracted_tags
+        )
+
+    def _make_task(self, name: str) -> TaskItem:
+        return TaskItem(
+            name=name,
+            tags=self.classification.extracted_tags,
+            duration=self.classification.estimated_duration or "unknown",
+            notes=self.classification.notes
+        )
+
+    # ClassVar: not a dataclass field, so it does not take a slot
+    _FACTORIES: ClassVar[Dict[ClassificationType, Callable[["DraftItem", str], ProjectItem]]] = {
+        ClassificationType.INCUBATE: _make_incubate,
+        ClassificationType.SHOPPING: _make_shopping,
+        ClassificationType.REFERENCE: _make_reference,
+    }
+
+# --- SCAN INDEX (Read Model) ---
+@dataclass
+class ScanIndex:
+    """
+    Column-oriented (SoA) snapshot of the predicates the hot read paths filter on.
+    Parallel lists: position i of every column describes the same item.
+    """
+    # Open-able tasks of ACTIVE projects
+    tasks: List[TaskItem] = field(default_factory=list)
+    task_completed: List[bool] = field(default_factory=list)
+    # One bit per distinct tag (see tag_bits); Python ints are unbounded
+    task_tag_masks: List[int] = field(default_factory=list)
+    tag_bits: Dict[str, int] = field(default_factory=dict)
+
+    # Resources of non-COMPLETED projects
+    resources: List[ResourceItem] = field(default_factory=list)
+    resource_acquired: List[bool] = field(default_factory=list)
+    resource_projects: List[str] = field(default_factory=list)
+
+    # Reverse index: GoalID (None = orphaned) -> Projects, all statuses
+    projects_by_goal: Dict[Optional[str], List[Project]] = field(default_factory=dict)
+    # Partition: ProjectID -> incomplete tasks, all project statuses
+    open_tasks_by_project: Dict[str, List[TaskItem]] = field(default_factory=dict)
+    # Partition: ProjectID -> items still in play (open tasks, unacquired resources, references)
+    active_items_by_project: Dict[str, List[ProjectItem]] = field(default_factory=dict)
+
+    # Materialized view: context tag (None = all) -> open tasks, filled on first request
+    open_tasks_by_context: Dict[Optional[str], List[TaskItem]] = field(default_factory=dict)
+    # Materialized view: GoalID -> projects sorted by sort_order, filled on first request
+    ordered_by_goal: Dict[Optional[str], List[Project]] = field(default_factory=dict)
+    # Materialized view: store -> unacquired (resource, project name), filled on first request
+    shopping: Optional[Mapping[str, Tuple[Tuple[ResourceItem, str], ...]]] = None
+    # Materialized view: triage AI context tree; goal edits bump the version too, so the snapshot covers them
+    context_tree: Optional[str] = None
+
+    @classmethod
+    def build(cls, projects: List[Project]) -> "ScanIndex":
+        index = cls()
+        for p in projects:
+            index.projects_by_goal.setdefault(p.goal_id, []).append(p)
+            open_tasks = index.open_tasks_by_project[p.id] = []
+            active_items = index.active_items_by_project[p.id] = []
+            is_active = p.status is ProjectStatus.ACTIVE
+            is_completed = p.status is ProjectStatus.COMPLETED
+            # One dispatch on the kind discriminator per item; every view below reads the partitions
+            for item in p.items:
+                kind = item.kind
+                if kind == 'task':
+                    if not item.is_completed:
+                        open_tasks.append(item)
+                        active_items.append(item)
+                    if is_active:
+                        index.tasks.append(item)
+                        index.task_completed.append(item.is_completed)
+                        index.task_tag_masks.append(index._encode_tags(item.tags))
+                elif kind == 'resource':
+                    if not item.is_acquired:
+                        active_items.append(item)
+                    if not is_completed:
+                        index.resources.append(item)
+                        index.resource_acquired.append(item.is_acquired)
+                        index.resource_projects.append(p.name)
+                else:
+                    active_items.append(item)
+        return index
+
+    def open_tasks(self, context_filter: Optional[str] = None) -> List[TaskItem]:
+        """Open tasks carrying context_filter (all open tasks if None), cached per context."""
+        view = self.open_tasks_by_context.get(context_filter)
+        if view is None:
+            ctx_mask = None
+            if context_filter is not None:
+                ctx_mask = self.tag_bits.get(context_filter)
+            if context_filter is not None and ctx_mask is None:
+                view = []  # No task carries this tag
+            else:
+                tasks = self.tasks
+                view = [tasks[i] for i in _scan_open_tasks(self.task_completed, self.task_tag_masks, ctx_mask)]
+            self.open_tasks_by_context[context_filter] = view
+        return view
+
+    def ordered_projects(self, goal_id: Optional[str]) -> List[Project]:
+        """Projects sharing goal_id (all statuses) in display order, cached per goal."""
+        bucket = self.ordered_by_goal.get(goal_id)
+        if bucket is None:
+            bucket = self.ordered_by_goal[goal_id] = sorted(
+                self.projects_by_goal.get(goal_id, ()), key=attrgetter("sort_order")
             )
+        return bucket
 
-        elif kind == ClassificationType.REFERENCE:
-            content_val = notes if notes else self.source_text
-            return ReferenceItem(
-                name=name,
-                content=content_val,
-                tags=tags
-            )
+    def shopping_list(self) -> Mapping[str, Sequence[Tuple[ResourceItem, str]]]:
+        """
+        Unacquired resources grouped by store, cached for the life of the snapshot.
+        Read-only (mapping proxy over tuples), since every reader shares the same object.
+        """
+        if self.shopping is None:
+            shopping = defaultdict(list)
+            for item, is_acquired, project_name in zip(self.resources, self.resource_acquired, self.resource_projects):
+                if not is_acquired:
+                    shopping[item.store].append((item, project_name))
+            self.shopping = MappingProxyType({store: tuple(entries) for store, entries in shopping.items()})
+        return self.shopping
+
+    def _encode_tags(self, tags: List[str]) -> int:
+        mask = 0
+        for tag in tags:
+            bit = self.tag_bits.get(tag)
+            if bit is None:
+                bit = self.tag_bits[tag] = 1 << len(self.tag_bits)
+            mask |= bit
+        return mask
+
+
+def _scan_open_tasks(completed: List[bool], tag_masks: List[int], ctx_mask: Optional[int]) -> List[int]:
+    """
+    Scan kernel: indices of open tasks, optionally narrowed to those whose
+    tag mask shares a bit with ctx_mask. ctx_mask=None disables the tag filter.
+    """
+    if ctx_mask is None:
+        return [i for i, done in enumerate(completed) if not done]
+    return [i for i, (done, mask) in enumerate(zip(completed, tag_masks)) if not done and mask & ctx_mask]
+
+
+def _needs_enrichment(item: ProjectItem) -> bool:
+    """Heuristic: Missing tags AND duration; skip if completed/acquired"""
+    if item.tags:
+        return False
+    kind = item.kind
+    if kind == 'task':
+        return not item.is_completed and item.duration == 'unknown'
+    if kind == 'resource':
+        return not item.is_acquired
+    return True
 
-        else:
-            return TaskItem(
-                name=name,
-                tags=tags,
-                duration=duration,
-                notes=notes
-            )
 
 # --- REPOSITORY ---
 class YamlRepository:
@@ -78,48 +227,160 @@ class YamlRepository:
 
         # STATE MANAGEMENT
         self._is_dirty = False
+        # Nesting depth of batch() blocks; dirty flag is deferred while > 0
+        self._batch_depth = 0
+        self._pending_dirty = False
+        # What changed since the last save, handed to the persistence layer
+        self._dirty_hint = DirtyHint()
+        # ProjectID -> dump from the last save, reused for projects outside the hint. Held here and not
+        # by the saver: the DatasetManager is shared across sessions, each with its own copy of the data
+        self._project_dumps: Dict[str, Dict[str, Any]] = {}
+        # Bumped on every mutation; derived read models are keyed on it
+        self._version = 0
+        self._scan_index: Optional[ScanIndex] = None
+        self._scan_version = -1
 
         # INDEXING (Updated for Polymorphism)
         # Maps ItemID -> (Project, Item)
         self._item_index: Dict[str, Tuple[Project, ProjectItem]] = {}
+        # Maps ProjectID / ProjectName -> Project
+        self._project_by_id: Dict[str, Project] = {}
+        self._project_by_name: Dict[str, Project] = {}
+        # Maps GoalID -> Goal
+        self._goal_by_id: Dict[str, Goal] = {}
+        # Inbox text -> occurrences, for O(1) membership (the list keeps order for YAML)
+        self._inbox_counts: Counter = Counter()
+        # The projects/goals/inbox lists the indexes were built from, and their lengths. Code that
+        # assigns or appends to self.data directly is picked up by _ensure_index on the next lookup.
+        self._indexed_lists: Tuple[list, list, list] = ((), (), ())
+        self._indexed_sizes: Tuple[int, int, int] = (-1, -1, -1)
         self._rebuild_index()
 
     @property
     def is_dirty(self) -> bool:
         return self._is_dirty
 
-    def mark_dirty(self):
+    def mark_dirty(self, *project_ids: str, item_id: Optional[str] = None,
+                   inbox: bool = False, goals: bool = False):
+        """
+        Records a mutation. The hints (changed projects, owning project of item_id,
+        inbox, goals) let save() skip re-serializing untouched projects; a call
+        without any hint means unknown scope and forces a full rewrite.
+        """
+        self._ensure_index()
+        # Version bumps immediately so read models stay correct inside a batch
+        self._version += 1
+        self._record_dirty_hint(project_ids, item_id, inbox, goals)
+        if self._batch_depth:
+            self._pending_dirty = True
+            return
+        self._set_dirty()
+
+    def _set_dirty(self):
         if not self._is_dirty:
             logger.debug("Repository marked as dirty.")
         self._is_dirty = True
 
+    def _record_dirty_hint(self, project_ids, item_id, inbox, goals):
+        hint = self._dirty_hint
+        if item_id is not None:
+            owner = self._item_index.get(item_id)
+            if owner is None:
+                hint.projects = None  # Unindexed item: owner unknown
+                return
+            project_ids += (owner[0].id,)
+        if not (project_ids or inbox or goals):
+            hint.projects = None
+            return
+        if hint.projects is not None:
+            hint.projects.update(project_ids)
+        hint.inbox |= inbox
+        hint.goals |= goals
+
+    @contextmanager
+    def batch(self):
+        """Groups several mutations so the dirty flag is settled once, when the outermost batch exits."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._pending_dirty:
+                self._pending_dirty = False
+                self._set_dirty()
+
     def save(self):
         """Explicit Save"""
         if self._is_dirty:
             logger.info(f"Persisting dataset '{self.name}' to storage.")
-            self.dm.save_dataset(self.name, self.data)
+            self.dm.save_dataset(self.name, self.data, dirty=self._dirty_hint, project_dumps=self._project_dumps)
             self._is_dirty = False
+            self._dirty_hint = DirtyHint()
         else:
             logger.debug("Save requested, but repository is clean. Skipping.")
 
     def _rebuild_index(self):
         logger.debug("Rebuilding item index.")
         self._item_index.clear()
+        self._project_by_id.clear()
+        self._project_by_name.clear()
+        self._goal_by_id = {g.id: g for g in self.data.goals}
+        self._inbox_counts = Counter(self.data.inbox_tasks)
+        self._scan_index = None
         count = 0
         for p in self.data.projects:
+            self._index_project(p)
             for item in p.items:
                 self._item_index[item.id] = (p, item)
                 count += 1
+        self._indexed_lists = (self.data.projects, self.data.goals, self.data.inbox_tasks)
+        self._note_sizes()
         logger.debug(f"Index rebuild complete. Indexed {count} items.")
 
+    def _note_sizes(self):
+        data = self.data
+        self._indexed_sizes = (len(data.projects), len(data.goals), len(data.inbox_tasks))
+
+    def _ensure_index(self):
+        """
+        Rebuilds the indexes if self.data's projects, goals or inbox list was replaced or resized
+        outside the register_*/inbox methods. Items appended to a project directly still need
+        register_item.
+        """
+        data = self.data
+        projects, goals, inbox = self._indexed_lists
+        if (data.projects is not projects or data.goals is not goals or data.inbox_tasks is not inbox
+                or (len(data.projects), len(data.goals), len(data.inbox_tasks)) != self._indexed_sizes):
+            self._rebuild_index()
+
+    def get_scan_index(self) -> ScanIndex:
+        """Returns the column snapshot, rebuilding it only if data changed since the last scan."""
+        self._ensure_index()
+        if self._scan_index is None or self._scan_version != self._version:
+            self._scan_index = ScanIndex.build(self.data.projects)
+            self._scan_version = self._version
+        return self._scan_index
+
+    def _index_project(self, project: Project):
+        self._project_by_id[project.id] = project
+        # First project wins on duplicate names (matches the old linear scan)
+        self._project_by_name.setdefault(project.name, project)
+
     # CHANGED: Project ID is now str (UUID)
     def find_project(self, project_id: str) -> Optional[Project]:
-        return next((p for p in self.data.projects if p.id == project_id), None)
+        self._ensure_index()
+        return self._project_by_id.get(project_id)
 
     def find_project_by_name(self, name: str) -> Optional[Project]:
-        return next((p for p in self.data.projects if p.name == name), None)
+        self._ensure_index()
+        return self._project_by_name.get(name)
+
+    def find_goal(self, goal_id: str) -> Optional[Goal]:
+        self._ensure_index()
+        return self._goal_by_id.get(goal_id)
 
     def find_item(self, item_id: str) -> Optional[ProjectItem]:
+        self._ensure_index()
         if item_id in self._item_index:
             return self._item_index[item_id][1]
         logger.debug(f"Item lookup failed for ID: {item_id}")
@@ -128,8 +389,59 @@ class YamlRepository:
     def register_item(self, project: Project, item: ProjectItem):
         """Update index and dirty flag"""
         logger.debug(f"Registering new item '{item.name}' ({item.id}) to Project '{project.name}'")
+        self._ensure_index()
         self._item_index[item.id] = (project, item)
-        self.mark_dirty()
+        self.mark_dirty(project.id)
+
+    # --- INBOX ---
+    def has_inbox_item(self, text: str) -> bool:
+        self._ensure_index()
+        return self._inbox_counts[text] > 0
+
+    def add_inbox_item(self, text: str):
+        self._ensure_index()
+        self.data.inbox_tasks.append(text)
+        self._inbox_counts[text] += 1
+        self._note_sizes()
+
+    def remove_inbox_item(self, text: str) -> bool:
+        """Removes the first occurrence. Returns False (without scanning) if absent."""
+        self._ensure_index()
+        if self._inbox_counts[text] <= 0:
+            return False
+        self.data.inbox_tasks.remove(text)
+        self._inbox_counts[text] -= 1
+        self._note_sizes()
+        return True
+
+    def rotate_inbox_item(self, text: str) -> bool:
+        """Moves an item to the back of the inbox. Returns False if absent."""
+        self._ensure_index()
+        if self._inbox_counts[text] <= 0:
+            return False
+        self.data.inbox_tasks.remove(text)
+        self.data.inbox_tasks.append(text)
+        return True
+
+    def register_project(self, project: Project):
+        """Add a new project to the dataset, update indexes and dirty flag"""
+        logger.debug(f"Registering new project '{project.name}' ({project.id})")
+        self._ensure_index()
+        self.data.projects.append(project)
+        self._index_project(project)
+        for item in project.items:
+            self._item_index[item.id] = (project, item)
+        self._note_sizes()
+        self.mark_dirty(project.id)
+
+    def register_goal(self, goal: Goal):
+        """Add a new goal to the dataset, update index and dirty flag"""
+        logger.debug(f"Registering new goal '{goal.name}' ({goal.id})")
+        self._ensure_index()
+        self.data.goals.append(goal)
+        self._goal_by_id[goal.id] = goal
+        self._note_sizes()
+        self.mark_dirty(goals=True)
 
 
 # --- SERVICES ---
@@ -138,22 +450,25 @@ class TriageService:
     def __init__(self, repo: YamlRepository):
         self.repo = repo
 
-    def get_inbox_items(self) -> List[str]:
-        return self.repo.data.inbox_tasks
+    def get_inbox_items(self) -> Sequence[str]:
+        """
+        Read-only snapshot of the inbox. Mutate through add_to_inbox /
+        delete_inbox_item / skip_inbox_item so the repository stays coherent.
+        """
+        return tuple(self.repo.data.inbox_tasks)
 
     def add_to_inbox(self, text: str) -> None:
         logger.info(f"Adding new item to Inbox: '{text[:30]}...'")
-        self.repo.data.inbox_tasks.append(text)
-        self.repo.mark_dirty()
+        self.repo.add_inbox_item(text)
+        self.repo.mark_dirty(inbox=True)
 
     def delete_inbox_item(self, item_text: str) -> None:
         """
         Manual Only: Permanently removes item from system (Trash).
         """
-        if item_text in self.repo.data.inbox_tasks:
-            logger.info(f"Deleting item from Inbox: '{item_text[:30]}...'")
-            self.repo.data.inbox_tasks.remove(item_text)
-            self.repo.mark_dirty()
+        if self.repo.remove_inbox_item(item_text):
+            logger.info(f"Deleted item from Inbox: '{item_text[:30]}...'")
+            self.repo.mark_dirty(inbox=True)
         else:
             logger.warning(f"Attempted to delete inbox item '{item_text[:30]}...' but it was not found.")
 
@@ -179,107 +494,104 @@ class TriageService:
         """
         logger.info(f"Applying draft. Source: '{draft.source_text[:30]}...'")
 
-        # 1. Determine Project
-        project = None
-        if override_project_id:
-            project = self.repo.find_project(override_project_id)
-        elif draft.classification.suggested_project != "Unmatched":
-            target_name = draft.classification.suggested_project
-            project = self.repo.find_project_by_name(target_name)
-
-            # =================================================================
-            # 🛡️ FIX: AUTO-CREATE SYSTEM BUCKETS
-            # If AI suggests a standard GTD bucket that doesn't exist yet, create it.
-            # =================================================================
-            if not project and target_name in ["General", "Someday/Maybe", "Inbox"]:
-                logger.info(f"Auto-creating missing system project: '{target_name}'")
-
-                # CHANGED: Generate new UUID
-                new_id = str(uuid.uuid4())
-
-                # Create and Register
-                project = Project(id=new_id, name=target_name, description="System generated container")
-                self.repo.data.projects.append(project)
-                self.repo.mark_dirty()
-            # =================================================================
-
-        if not project:
-            logger.error(f"Target project not found for draft: '{draft.source_text}' -> '{draft.classification.suggested_project}'")
-            raise ValueError("Target project not found")
-
-        # 2. Create Entity (Polymorphic)
-        new_item = draft.to_entity()
-
-        # 3. Add to Unified Stream
-        project.items.append(new_item)
-        self.repo.register_item(project, new_item)
-        logger.info(f"Item '{new_item.name}' added to Project '{project.name}'")
-
-        # 4. Remove from Inbox
-        if draft.source_text in self.repo.data.inbox_tasks:
-            self.repo.data.inbox_tasks.remove(draft.source_text)
-            self.repo.mark_dirty()
+        with self.repo.batch():
+            # 1. Determine Project
+            project = None
+            if override_project_id:
+                project = self.repo.find_project(override_project_id)
+            elif draft.classification.suggested_project != "Unmatched":
+                target_name = draft.classification.suggested_project
+                project = self.repo.find_project_by_name(target_name)
+
+                # =================================================================
+                # 🛡️ FIX: AUTO-CREATE SYSTEM BUCKETS
+                # If AI suggests a standard GTD bucket that doesn't exist yet, create it.
+                # =================================================================
+                if not project and target_name in ["General", "Someday/Maybe", "Inbox"]:
+                    logger.info(f"Auto-creating missing system project: '{target_name}'")
+
+                    # CHANGED: Generate new UUID
+                    new_id = str(uuid.uuid4())
+
+                    # Create and Register
+                    project = Project(id=new_id, name=target_name, description="System generated container")
+                    self.repo.register_project(project)
+                # =================================================================
+
+            if not project:
+                logger.error(f"Target project not found for draft: '{draft.source_text}' -> '{draft.classification.suggested_project}'")
+                raise ValueError("Target project not found")
+
+            # 2. Create Entity (Polymorphic)
+            new_item = draft.to_entity()
+
+            # 3. Add to Unified Stream
+            project.items.append(new_item)
+            self.repo.register_item(project, new_item)
+            logger.info(f"Item '{new_item.name}' added to Project '{project.name}'")
+
+            # 4. Remove from Inbox
+            if self.repo.remove_inbox_item(draft.source_text):
+                self.repo.mark_dirty(inbox=True)
 
     def create_project_from_draft(self, draft: DraftItem, new_project_name: str) -> None:
         logger.info(f"Creating new project from draft: '{new_project_name}'")
-        # 1. Create Project
-        # CHANGED: UUID generation
-        new_id = str(uuid.uuid4())
-        new_proj = Project(id=new_id, name=new_project_name)
-        self.repo.data.projects.append(new_proj)
+        with self.repo.batch():
+            # 1. Create Project
+            # CHANGED: UUID generation
+            new_id = str(uuid.uuid4())
+            new_proj = Project(id=new_id, name=new_project_name)
+            self.repo.register_project(new_proj)
 
-        # 2. Apply Draft to new project
-        self.apply_draft(draft, override_project_id=new_id)
+            # 2. Apply Draft to new project
+            self.apply_draft(draft, override_project_id=new_id)
 
     def skip_inbox_item(self, item_text: str) -> None:
         # Rotate to end
-        if item_text in self.repo.data.inbox_tasks:
-            logger.debug(f"Rotating inbox item: '{item_text[:20]}...'")
-            self.repo.data.inbox_tasks.remove(item_text)
-            self.repo.data.inbox_tasks.append(item_text)
-            self.repo.mark_dirty()
+        if self.repo.rotate_inbox_item(item_text):
+            logger.debug(f"Rotated inbox item: '{item_text[:20]}...'")
+            self.repo.mark_dirty(inbox=True)
 
     def move_inbox_item_to_project(self, item_text: str, project_id: str, tags: List[str]) -> None:
         """
         Convenience method: Move inbox item directly to a project as a TaskItem.
         """
         logger.info(f"Manually moving inbox item to Project ID {project_id}")
-        project = self.repo.find_project(project_id)
-        if not project:
-            logger.error(f"Project {project_id} not found during manual move.")
-            raise ValueError(f"Project {project_id} not found")
-        
-        # Create TaskItem directly (simpler for manual assignment)
-        task_item = TaskItem(name=item_text, tags=tags)
-        project.items.append(task_item)
-        self.repo.register_item(project, task_item)
-        
-        # Remove from inbox
-        if item_text in self.repo.data.inbox_tasks:
-            self.repo.data.inbox_tasks.remove(item_text)
-            self.repo.mark_dirty()
+        with self.repo.batch():
+            project = self.repo.find_project(project_id)
+            if not project:
+                logger.error(f"Project {project_id} not found during manual move.")
+                raise ValueError(f"Project {project_id} not found")
+
+            # Create TaskItem directly (simpler for manual assignment)
+            task_item = TaskItem(name=item_text, tags=tags)
+            project.items.append(task_item)
+            self.repo.register_item(project, task_item)
+
+            # Remove from inbox
+            if self.repo.remove_inbox_item(item_text):
+                self.repo.mark_dirty(inbox=True)
 
     def create_project_from_inbox(self, item_text: str, new_project_name: str) -> None:
         """
         Convenience method: Create a new project and move inbox item to it.
         """
         logger.info(f"Creating project '{new_project_name}' from inbox item.")
-        # Create Project
-        # CHANGED: UUID generation
-        new_id = str(uuid.uuid4())
-        new_proj = Project(id=new_id, name=new_project_name)
-        self.repo.data.projects.append(new_proj)
-        self.repo.mark_dirty()
-        
-        # Create TaskItem and add to new project
-        task_item = TaskItem(name=item_text)
-        new_proj.items.append(task_item)
-        self.repo.register_item(new_proj, task_item)
-        
-        # Remove from inbox
-        if item_text in self.repo.data.inbox_tasks:
-            self.repo.data.inbox_tasks.remove(item_text)
-            self.repo.mark_dirty()
+        with self.repo.batch():
+            # Create Project
+            # CHANGED: UUID generation
+            new_id = str(uuid.uuid4())
+            new_proj = Project(id=new_id, name=new_project_name)
+            self.repo.register_project(new_proj)
+
+            # Create TaskItem and add to new project
+            task_item = TaskItem(name=item_text)
+            new_proj.items.append(task_item)
+            self.repo.register_item(new_proj, task_item)
+
+            # Remove from inbox
+            if self.repo.remove_inbox_item(item_text):
+                self.repo.mark_dirty(inbox=True)
 
     def get_triage_tags(self) -> List[str]:
         """
@@ -291,12 +603,10 @@ class TriageService:
         tags = set(TagKnowledgeBase.get_all_tags())
 
         # 2. Add tags actually used in the database (User's custom tags)
-        for p in self.repo.data.projects:
-            for item in p.items:
-                if hasattr(item, 'tags'):
-                    tags.update(item.tags)
+        # Every item kind inherits ProjectItem.tags, so no hasattr probe is needed
+        tags.update(chain.from_iterable(item.tags for p in self.repo.data.projects for item in p.items))
 
-        return sorted(list(tags))
+        return sorted(tags)
 
     # --- FIX: Alias for View Compatibility ---
     def get_all_tags(self) -> List[str]:
@@ -305,77 +615,93 @@ class TriageService:
     def build_full_context_tree(self) -> str:
         """
         Builds a rich, indented text tree of Goals > Projects > Active Items.
+        Rendered once per data version: every inbox item of a triage session reuses it.
         """
+        scan = self.repo.get_scan_index()
+        if scan.context_tree is None:
+            scan.context_tree = self._render_context_tree(scan.active_items_by_project)
+        return scan.context_tree
+
+    def _render_context_tree(self, active_items_by_project: Dict[str, List[ProjectItem]]) -> str:
         logger.debug("Building full context tree for AI context.")
-        lines = ["```"]  # Start Code Block
+        buf = io.StringIO()
+        write = buf.write
+        write("```\n")  # Start Code Block
 
         # Helper to format items
         def _append_items(project, indent="    "):
-            # Filter for incomplete tasks/resources only
-            active_items = [i for i in project.items if
-                            not getattr(i, 'is_completed', False) and not getattr(i, 'is_acquired', False)]
+            # Incomplete tasks/resources only, precomputed per snapshot
+            active_items = active_items_by_project.get(project.id, ())
 
             if not active_items:
-                lines.append(f"{indent}(No active items)")
+                write(f"{indent}(No active items)\n")
                 return
 
             for item in active_items:
                 if item.kind == 'task':
                     tags_str = ", ".join(item.tags) if item.tags else "no-tags"
-                    lines.append(f"{indent}- {item.name}: {item.duration}, [{tags_str}]")
+                    write(f"{indent}- {item.name}: {item.duration}, [{tags_str}]\n")
                 elif item.kind == 'resource':
-                    lines.append(f"{indent}- {item.name}: {item.store} (Resource)")
+                    write(f"{indent}- {item.name}: {item.store} (Resource)\n")
                 elif item.kind == 'reference':
-                    lines.append(f"{indent}- {item.name} (Reference)")
+                    write(f"{indent}- {item.name} (Reference)\n")
+
+        # Bucket active projects by goal in one pass (None = orphaned), ordered as in the planner
+        by_goal: Dict[Optional[str], List[Project]] = defaultdict(list)
+        for p in self.repo.data.projects:
+            if p.status is ProjectStatus.ACTIVE:
+                by_goal[p.goal_id or None].append(p)
+        for bucket in by_goal.values():
+            bucket.sort(key=attrgetter("sort_order"))
 
         # 1. Process Goals
         for goal in self.repo.data.goals:
-            lines.append(f"GOAL: {goal.name}")
+            write(f"GOAL: {goal.name}\n")
 
             if goal.description:
-                lines.append(f"  MOTIVATION: {goal.description}")
+                write(f"  MOTIVATION: {goal.description}\n")
 
             # Get active projects for this goal
-            projects = [p for p in self.repo.data.projects if p.goal_id == goal.id and p.status == "active"]
+            projects = by_goal.get(goal.id, ())
 
             if not projects:
-                lines.append("  (No active projects)")
+                write("  (No active projects)\n")
 
             for proj in projects:
-                lines.append(f"  PROJECT: {proj.name}")
+                write(f"  PROJECT: {proj.name}\n")
 
                 if proj.description:
-                    lines.append(f"    CONTEXT: {proj.description}")
+                    write(f"    CONTEXT: {proj.description}\n")
 
                 _append_items(proj)
 
-            lines.append("")
+            write("\n")
 
         # 2. Process Orphaned Projects (Maintenance/Misc)
-        orphans = [p for p in self.repo.data.projects if not p.goal_id and p.status == "active"]
+        orphans = by_goal.get(None, ())
         if orphans:
-            lines.append("GOAL: Maintenance & Misc (No specific goal)")
+            write("GOAL: Maintenance & Misc (No specific goal)\n")
             for proj in orphans:
-                lines.append(f"  PROJECT: {proj.name}")
+                write(f"  PROJECT: {proj.name}\n")
                 if proj.description:
-                    lines.append(f"    CONTEXT: {proj.description}")
+                    write(f"    CONTEXT: {proj.description}\n")
                 _append_items(proj)
 
-        lines.append("```") # End Code Block
-        return "\n".join(lines)
+        write("```")  # End Code Block
+        return buf.getvalue()
 
 class PlanningService:
     def __init__(self, repo: YamlRepository):
         self.repo = repo
 
-    def get_all_goals(self) -> List[Goal]:
-        return self.repo.data.goals
+    def get_all_goals(self) -> Sequence[Goal]:
+        """Read-only snapshot of the goals. Use create_goal to add new ones."""
+        return tuple(self.repo.data.goals)
 
     def create_goal(self, name: str, description: str) -> Goal:
         logger.info(f"Creating new Goal: '{name}'")
         new_goal = Goal(name=name, description=description)
-        self.repo.data.goals.append(new_goal)
-        self.repo.mark_dirty()
+        self.repo.register_goal(new_goal)
         return new_goal
 
     # CHANGED: project_id is str
@@ -403,11 +729,11 @@ class PlanningService:
 
     def get_projects_for_goal(self, goal_id: str) -> List[Project]:
         """Get all projects linked to a specific goal"""
-        return [p for p in self.repo.data.projects if p.goal_id == goal_id]
+        return list(self.repo.get_scan_index().projects_by_goal.get(goal_id, ()))
 
     def get_orphaned_projects(self) -> List[Project]:
         """Get all projects not linked to any goal"""
-        return [p for p in self.repo.data.projects if p.goal_id is None]
+        return list(self.repo.get_scan_index().projects_by_goal.get(None, ()))
 
     def add_resource(self, project_id: int, name: str, r_type: ResourceType, store: str = "General") -> None:
         """Add a ResourceItem to a project's unified stream"""
@@ -440,13 +766,12 @@ class PlanningService:
         
         # Verify goal exists if provided
         if goal_id is not None:
-            goal_exists = any(g.id == goal_id for g in self.repo.data.goals)
-            if not goal_exists:
+            if self.repo.find_goal(goal_id) is None:
                 logger.error(f"Goal {goal_id} not found during linking.")
                 raise ValueError(f"Goal {goal_id} not found")
         
         project.goal_id = goal_id
-        self.repo.mark_dirty()
+        self.repo.mark_dirty(project.id)
 
     def complete_item(self, item_id: str) -> None:
         """Toggle completion status of an item"""
@@ -458,10 +783,10 @@ class PlanningService:
         logger.info(f"Toggling completion for item '{item.name}' ({item_id})")
         if isinstance(item, TaskItem):
             item.is_completed = not item.is_completed
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(item_id=item_id)
         elif isinstance(item, ResourceItem):
             item.is_acquired = not item.is_acquired
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(item_id=item_id)
 
     def move_project(self, project_id: str, direction: str):
         """
@@ -474,14 +799,9 @@ class PlanningService:
 
         logger.debug(f"Moving Project {project_id} {direction}")
 
-        # 1. Get all projects in the same context (same Goal or same Orphaned state)
-        siblings = [
-            p for p in self.repo.data.projects
-            if p.goal_id == target_proj.goal_id
-        ]
-
-        # 2. Sort them by current order
-        siblings.sort(key=lambda p: p.sort_order)
+        # 1. Get all projects in the same context (same Goal or same Orphaned state),
+        # 2. sorted by current order: one bucket from the snapshot, not a full filter + sort
+        siblings = self.repo.get_scan_index().ordered_projects(target_proj.goal_id)
 
         try:
             idx = siblings.index(target_proj)
@@ -493,13 +813,13 @@ class PlanningService:
             # Swap sort_order with the one above
             neighbor = siblings[idx - 1]
             target_proj.sort_order, neighbor.sort_order = neighbor.sort_order, target_proj.sort_order
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(target_proj.id, neighbor.id)
 
         elif direction == "down" and idx < len(siblings) - 1:
             # Swap sort_order with the one below
             neighbor = siblings[idx + 1]
             target_proj.sort_order, neighbor.sort_order = neighbor.sort_order, target_proj.sort_order
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(target_proj.id, neighbor.id)
 
     def enrich_project(self, project_id: str, classifier) -> Tuple[int, Dict]:
         """
@@ -512,44 +832,22 @@ class PlanningService:
         # 1. Find Goal Name for context
         goal_name = "No Goal"
         if project.goal_id:
-            goal = next((g for g in self.repo.data.goals if g.id == project.goal_id), None)
+            goal = self.repo.find_goal(project.goal_id)
             if goal: goal_name = goal.name
 
-        # 2. PRE-CALCULATE CONTEXT & IDENTIFY CANDIDATES
-        existing_project_tags = set()
-        project_items_summary = []
-        candidates = []
-
-        for item in project.items:
-            # A. Build Context (from ALL items)
-            if hasattr(item, 'tags') and item.tags:
-                existing_project_tags.update(item.tags)
-                tags_display = f"[{', '.join(item.tags)}]"
-            else:
-                tags_display = ""
-
-            # Add to summary string (limit context size implicitly by loop)
-            project_items_summary.append(f"- {item.name} {tags_display}")
-
-            # B. Identify Candidates (Items needing enrichment)
-            # Skip if completed/acquired
-            if getattr(item, 'is_completed', False) or getattr(item, 'is_acquired', False):
-                continue
-
-            # Heuristic: Missing tags AND duration
-            has_tags = bool(item.tags)
-            has_duration = getattr(item, 'duration', 'unknown') != 'unknown'
-
-            if not has_tags and not has_duration:
-                candidates.append(item)
-
-        # Prepare Context Variables
-        project_context_str = "\n".join(project_items_summary[:50])  # Limit context to 50 items
-        extra_tags_list = list(existing_project_tags)
-
+        # 2. IDENTIFY CANDIDATES first, so already-enriched projects return before any context is built
+        candidates = [item for item in project.items if _needs_enrichment(item)]
         if not candidates:
             return 0, {}
 
+        # Prepare Context Variables (from ALL items)
+        existing_project_tags = set(chain.from_iterable(item.tags for item in project.items))
+        project_context_str = "\n".join(  # Limit context to 50 items
+            f"- {item.name} [{', '.join(item.tags)}]" if item.tags else f"- {item.name} "
+            for item in project.items[:50]
+        )
+        extra_tags_list = list(existing_project_tags)
+
         # 3. Prepare Batch Request
         # Format: "ID: <uuid> | Name: <text>"
         target_items_str = "\n".join([f"ID: {item.id} | Name: {item.name}" for item in candidates])
@@ -566,24 +864,26 @@ class PlanningService:
 
             # 5. Map Results Back
             update_count = 0
+            candidates_by_id = {item.id: item for item in candidates}
             for enriched in batch_result.items:
                 # Find the original item object by ID
-                original_item = next((i for i in candidates if i.id == enriched.id), None)
+                original_item = candidates_by_id.get(enriched.id)
                 if original_item:
-                    original_item.tags = enriched.extracted_tags
-                    if hasattr(original_item, 'duration'):
+                    # Plain assignment skips the model validator, so intern here
+                    original_item.tags = intern_tags(enriched.extracted_tags)
+                    if original_item.kind == 'task':
                         original_item.duration = enriched.estimated_duration or "unknown"
                     if not original_item.notes and enriched.notes:
                         original_item.notes = enriched.notes
                     update_count += 1
 
             if update_count > 0:
-                self.repo.mark_dirty()
+                self.repo.mark_dirty(project.id)
 
             return update_count, debug_data
 
         except Exception as e:
-            logger.error(f"Batch enrichment failed: {e}")
+            logger.exception("Batch enrichment failed for project %s", project.name)
             return 0, {"error": str(e)}
 
 class ExecutionService:
@@ -592,18 +892,8 @@ class ExecutionService:
 
     def get_next_actions(self, context_filter: Optional[str] = None) -> List[TaskItem]:
         """Filter the unified stream for Tasks only"""
-        actions = []
-        for p in self.repo.data.projects:
-            if p.status != ProjectStatus.ACTIVE: continue
-
-            # Iterate Unified Stream
-            for item in p.items:
-                # Check Type
-                if isinstance(item, TaskItem) and not item.is_completed:
-                    if context_filter and context_filter not in item.tags:
-                        continue
-                    actions.append(item)
-        return actions
+        # Copy: the cached view is shared until the next mutation
+        return list(self.repo.get_scan_index().open_tasks(context_filter or None))
 
     def complete_item(self, item_id: str) -> None:
         item = self.repo.find_item(item_id)
@@ -618,31 +908,44 @@ class ExecutionService:
         # Polymorphic completion
         if isinstance(item, TaskItem):
             item.is_completed = not item.is_completed
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(item_id=item_id)
             logger.info(f"Task '{item.name}' completion toggled to: {item.is_completed}")
 
         elif isinstance(item, ResourceItem):
             item.is_acquired = not item.is_acquired
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(item_id=item_id)
             logger.info(f"Resource '{item.name}' acquired status toggled to: {item.is_acquired}")
 
         else:
             logger.warning(f"Item type {type(item)} matched neither TaskItem nor ResourceItem. No action taken.")
 
-    def get_shopping_list(self) -> Dict[str, List[Tuple[ResourceItem, str]]]:
-        from collections import defaultdict
-        shopping = defaultdict(list)
-
-        for p in self.repo.data.projects:
-            if p.status == ProjectStatus.COMPLETED: continue
+    def set_completed(self, item_id: str, value: bool) -> bool:
+        """
+        Sets the done state explicitly (is_completed for tasks, is_acquired for resources).
+        Idempotent: a repeated request leaves the repo clean. Returns True if state changed.
+        """
+        item = self.repo.find_item(item_id)
+        if isinstance(item, TaskItem):
+            if item.is_completed == value:
+                return False
+            item.is_completed = value
+        elif isinstance(item, ResourceItem):
+            if item.is_acquired == value:
+                return False
+            item.is_acquired = value
+        else:
+            logger.warning(f"set_completed: Item {item_id} is not a task or resource. No action taken.")
+            return False
 
-            for item in p.items:
-                if isinstance(item, ResourceItem) and not item.is_acquired:
-                    shopping[item.store].append((item, p.name))
+        logger.info(f"Item '{item.name}' done state set to: {value}")
+        self.repo.mark_dirty(item_id=item_id)
+        return True
 
-        return dict(shopping)
+    def get_shopping_list(self) -> Mapping[str, Sequence[Tuple[ResourceItem, str]]]:
+        """Read-only snapshot: store -> (resource, project name). Change items through toggle_resource_status."""
+        return self.repo.get_scan_index().shopping_list()
 
-    def get_aggregated_shopping_list(self) -> Dict[str, List[Tuple[ResourceItem, str]]]:
+    def get_aggregated_shopping_list(self) -> Mapping[str, Sequence[Tuple[ResourceItem, str]]]:
         """Alias for get_shopping_list() to match view expectations"""
         return self.get_shopping_list()
 
@@ -650,9 +953,11 @@ class ExecutionService:
         """Toggle the acquired status of a ResourceItem"""
         item = self.repo.find_item(resource_id)
         if isinstance(item, ResourceItem):
+            if item.is_acquired == is_acquired:
+                return  # Already in the requested state; keep the repo clean
             logger.info(f"Setting resource '{item.name}' acquired status to {is_acquired}")
             item.is_acquired = is_acquired
-            self.repo.mark_dirty()
+            self.repo.mark_dirty(item_id=resource_id)
         else:
             logger.error(f"Item {resource_id} is not a ResourceItem. Cannot toggle status.")
             raise ValueError(f"Item {resource_id} is not a ResourceItem")
@@ -1,8 +1,18 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
-import anthropic
+from typing import Callable, List, Optional, Sequence, Tuple
 import json
-from models.ai_schemas import ClassificationType, EnrichmentResult, BatchEnrichmentResponse
+import logging
+from models.ai_schemas import ClassificationType, EnrichmentResult, BatchEnrichmentResponse, BatchClassificationResult
 from models.entities import TagKnowledgeBase
 
 # Import Domain Models and DTOs
@@ -17,14 +27,24 @@ from models import (
     TagKnowledgeBase
 )
 
+from models.dtos import DirtyHint
 from dataset_io import YamlDatasetLoader, YamlDatasetSaver
+from services.rate_limit import AsyncTokenBucket
+
+logger = logging.getLogger("Services")
+
+# Letters, digits, '_' and '-', with at least one letter/digit (\w keeps the Unicode letters isalnum() accepted)
+_DATASET_NAME_RE = re.compile(r"[\w-]*[^\W_][\w-]*")
+
 
 class DatasetManager:
     def __init__(self, base_path: Path = Path("data/datasets")):
+        # Created lazily by the first save (YamlDatasetSaver makes the dataset folder with parents);
+        # load_dataset and list_datasets already treat a missing base_path as "no datasets"
         self.base_path = base_path
-        self.base_path.mkdir(parents=True, exist_ok=True)
         self._yaml_loader = YamlDatasetLoader()
         self._yaml_saver = YamlDatasetSaver()
+        self._datasets_listing: Optional[Tuple[int, List[str]]] = None  # (base_path mtime, names)
 
     def load_dataset(self, name: str) -> DatasetContent:
         """Load dataset - try YAML first"""
@@ -32,18 +52,23 @@ class DatasetManager:
         yaml_file = dataset_path / "dataset.yaml"
 
         if yaml_file.exists():
+            # Unchanged YAML is served from its JSON sidecar (same (mtime_ns, size) check), not re-parsed
             return self._yaml_loader.load(yaml_file)
         else:
             raise FileNotFoundError(f"Dataset '{name}' not found")
 
-    def save_dataset(self, name: str, content: DatasetContent) -> dict:
-        """Save dataset with validation and detailed result"""
+    def save_dataset(self, name: str, content: DatasetContent, dirty: Optional[DirtyHint] = None,
+                     project_dumps: Optional[dict] = None) -> dict:
+        """
+        Save dataset with validation and detailed result. dirty narrows what gets re-serialized;
+        project_dumps is the caller's cache of the previous save's project dumps (see YamlDatasetSaver).
+        """
         validation_error = self._validate_dataset_name(name)
         if validation_error:
             return {"success": False, "error": validation_error, "type": "validation"}
 
         try:
-            self._yaml_saver.save(self.base_path / name, content)
+            self._yaml_saver.save(self.base_path / name, content, dirty=dirty, project_dumps=project_dumps)
             return {"success": True, "message": f"Dataset '{name}' saved successfully"}
         except PermissionError:
             return {"success": False, "error": "Permission denied - check folder permissions", "type": "permission"}
@@ -57,44 +82,40 @@ class DatasetManager:
             return "Dataset name cannot be empty"
         if len(name) > 50:
             return "Dataset name too long (max 50 characters)"
-        if not name.replace('_', '').replace('-', '').isalnum():
+        if not _DATASET_NAME_RE.fullmatch(name):
             return "Dataset name can only contain letters, numbers, hyphens, and underscores"
         return ""
 
     def list_datasets(self) -> List[str]:
-        if not self.base_path.exists():
+        try:
+            mtime = self.base_path.stat().st_mtime_ns
+        except FileNotFoundError:
             return []
-        return [d.name for d in self.base_path.iterdir() if d.is_dir()]
-
+        # Adding/removing a dataset folder bumps the parent's mtime; anything else keeps the listing
+        if self._datasets_listing is None or self._datasets_listing[0] != mtime:
+            with os.scandir(self.base_path) as entries:
+                self._datasets_listing = (mtime, [e.name for e in entries if e.is_dir()])
+        return list(self._datasets_listing[1])
 
-class PromptBuilder:
-    """
-    Domain Service: Constructs prompts for the AI.
-    Now simplified because we rely on Structured Outputs for formatting.
-    """
 
-    def __init__(self, prompts_dir: Path = Path("data/prompts")):
-        self.prompts_dir = prompts_dir
-        self.config = SystemConfig()
+@lru_cache(maxsize=64)
+def _merge_tags(extra_tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    """De-duplicated tag vocabulary for prompts: built-in tags first, then the dataset's own, stable order."""
+    return tuple(dict.fromkeys(chain(TagKnowledgeBase.get_all_tags(), extra_tags)))
 
-    def build_triage_prompt(self, task_text: str, context_hierarchy: str, existing_tags: List[str] = None) -> str:
-        # 1. Get the Rich Markdown Table
-        tag_knowledge_table = TagKnowledgeBase.get_markdown_table()
 
-        # 2. Get simple list for validation
-        defaults = TagKnowledgeBase.get_all_tags()
-        available_tags_list = list(set(defaults + (existing_tags or [])))
+@lru_cache(maxsize=64)
+def _render_tag_list(existing_tags: Tuple[str, ...]) -> str:
+    """Quoted AVAILABLE TAGS list for the triage prompt."""
+    return ", ".join(f'"{t}"' for t in _merge_tags(existing_tags))
 
-        # --- FIX: Define tags_str ---
-        tags_str = ", ".join(f'"{t}"' for t in available_tags_list)
-        # ----------------------------
 
-        return f"""
+# Triage rules + flowchart, the same for every dataset; braces doubled for str.format_map
+_TRIAGE_RULES_TEMPLATE = """
         Act as my personal advisor and Getting Things Done methodology expert.
         Please analzye my item from inbox and follow flowchart and help me decide wher to put it.
         Respond in JSON based on structure I prepered for you in tools.
-        
-        INCOMING ITEM: "{task_text}"
+        CONTEXT and AVAILABLE TAGS follow the flowchart; the INCOMING ITEM to classify is given at the very end.
         
         INSTRUCTIONS:
         - Return ONLY the JSON object.
@@ -107,11 +128,7 @@ class PromptBuilder:
           2. Copy the EXACT URL into 'notes'.
           3. Do not strip UTM parameters unless they are excessively long.
 
-        CONTEXT (Goals > Projects > Existing Items):
-        {context_hierarchy}
-        
-        AVAILABLE TAGS: [{tags_str}]
-        ALLOWED DURATIONS: {self.config.ALLOWED_DURATIONS}
+        ALLOWED DURATIONS: {allowed_durations}
 
 ```mermaid
 flowchart TD
@@ -175,13 +192,84 @@ flowchart TD
     
 """
 
+
+# Per-dataset part of the triage prefix: changes whenever the project tree or tag set does
+_TRIAGE_CONTEXT_TEMPLATE = """
+        CONTEXT (Goals > Projects > Existing Items):
+        {context_hierarchy}
+        
+        AVAILABLE TAGS: [{tags_str}]
+"""
+
+
+@lru_cache(maxsize=1)
+def _render_triage_rules(allowed_durations: str) -> str:
+    return _TRIAGE_RULES_TEMPLATE.format_map({"allowed_durations": allowed_durations})
+
+
+@lru_cache(maxsize=8)
+def _render_triage_context(context_hierarchy: str, tags_str: str) -> str:
+    """
+    Only changes with the context tree or tag set, so every item of a triage session
+    hits this cache (the memoized context tree is the same str object: hash and == are O(1)).
+    """
+    return _TRIAGE_CONTEXT_TEMPLATE.format_map({"context_hierarchy": context_hierarchy, "tags_str": tags_str})
+
+
+class PromptBuilder:
+    """
+    Domain Service: Constructs prompts for the AI.
+    Now simplified because we rely on Structured Outputs for formatting.
+    """
+
+    def __init__(self, prompts_dir: Path = Path("data/prompts")):
+        self.prompts_dir = prompts_dir
+        self.config = SystemConfig()
+        # Pure functions of the static config: rendered once, not per prompt
+        self._durations_str = str(self.config.ALLOWED_DURATIONS)
+        self._default_tags_str = _render_tag_list(())
+
+    @staticmethod
+    def cache_clear():
+        """Drop memoized prompt fragments (e.g. after the tag vocabulary changed)."""
+        _merge_tags.cache_clear()
+        _render_tag_list.cache_clear()
+        _render_triage_rules.cache_clear()
+        _render_triage_context.cache_clear()
+
+    def build_triage_prompt(self, task_text: str, context_hierarchy: str, existing_tags: List[str] = None) -> str:
+        return "".join(self.build_triage_blocks(context_hierarchy, existing_tags)) + self.build_triage_item(task_text)
+
+    def build_triage_blocks(self, context_hierarchy: str, existing_tags: List[str] = None) -> Tuple[str, str]:
+        """
+        (rules, context) ahead of the incoming item, ordered from most to least stable so each can be a
+        prompt-cache breakpoint (see TaskClassifier._user_message): the rules survive any data edit.
+        """
+        rules = _render_triage_rules(self._durations_str)
+        context = _render_triage_context(
+            str(context_hierarchy),  # Same object for a str, so the memoized context tree stays a cheap key
+            _render_tag_list(tuple(existing_tags)) if existing_tags else self._default_tags_str
+        )
+        return rules, context
+
+    @staticmethod
+    def build_triage_item(task_text: str) -> str:
+        """Volatile tail of the triage prompt; the blocks before it are cacheable"""
+        return f'\n        INCOMING ITEM: "{task_text}"\n'
+
+    @staticmethod
+    def build_batch_triage_items(task_texts: List[str]) -> str:
+        """Numbered tail for classify_many; answered by one BatchClassificationResult"""
+        lines = ["INCOMING ITEMS (classify each one independently):"]
+        lines += [f'TASK_{n}: "{text}"' for n, text in enumerate(task_texts, start=1)]
+        lines.append("Return exactly one entry in 'results' per TASK_N and set its task_number to N.")
+        return "\n        " + "\n        ".join(lines) + "\n"
+
     def build_enrichment_prompt(self, item_name: str, project_name: str, goal_name: str,
                                 project_context_str: str, extra_tags: List[str]) -> str:
 
-        # ENRICHMENT: Defaults + User Added Tags (Extra)
-        defaults = TagKnowledgeBase.get_all_tags()
-        # Merge and Deduplicate
-        combined_tags = list(set(defaults + extra_tags))
+        # ENRICHMENT: Defaults + User Added Tags (Extra), merged once per tag set
+        combined_tags = list(_merge_tags(tuple(extra_tags)))
 
         return f"""
         Please act GTD techniq expert. Please help me to enrich my item based on below instruction.
@@ -194,7 +282,7 @@ flowchart TD
         {project_context_str}
         
         AVAILABLE TAGS: {combined_tags}
-        ALLOWED DURATIONS: {self.config.ALLOWED_DURATIONS}
+        ALLOWED DURATIONS: {self._durations_str}
 
         INSTRUCTIONS:
         1. Analyze the item in the context of its project.
@@ -207,13 +295,6 @@ flowchart TD
     def build_batch_enrichment_prompt(self, target_items_str: str, project_name: str, goal_name: str,
                                       project_context_str: str, extra_tags: List[str]) -> str:
 
-        # 1. Get the Rich Markdown Table
-        tag_knowledge_table = TagKnowledgeBase.get_markdown_table()
-
-        # 2. Get simple list for validation
-        defaults = TagKnowledgeBase.get_all_tags()
-        combined_tags = list(set(defaults + extra_tags))
-
         return f"""
         Please help me as my GTD advisor. Please analzye my project and its goal and assign duration and tags to my project items.
 
@@ -303,57 +384,401 @@ flowchart TD
         ...
         """
 
+# JSON schemas sent with / shown next to each call: static per output model, so built once at import
+_CLASSIFICATION_SCHEMA = ClassificationResult.model_json_schema()
+_BATCH_CLASSIFICATION_SCHEMA = BatchClassificationResult.model_json_schema()
+_ENRICHMENT_SCHEMA = EnrichmentResult.model_json_schema()
+_BATCH_ENRICHMENT_SCHEMA = BatchEnrichmentResponse.model_json_schema()
+
+
+# --- CLIENT FACTORIES (composition root) ---
+# The SDK clients already keep a keep-alive connection pool per client, so building each client once
+# (app.py caches them) saves the TCP+TLS handshake per request. The async client's pool is bound to
+# one event loop: TaskClassifier runs all async work on its own long-lived loop for that reason.
+# Read timeout stays generous: a full chunk of structured results can take minutes to generate.
+API_TIMEOUT = dict(timeout=300.0, connect=5.0)
+# SDK-level retries back off exponentially on connection errors, 408/409/429 and 5xx
+API_MAX_RETRIES = 3
+
+
+def make_client(api_key: str):
+    """Sync Anthropic client with explicit timeouts and retries."""
+    import anthropic
+    return anthropic.Anthropic(
+        api_key=api_key,
+        max_retries=API_MAX_RETRIES,
+        timeout=anthropic.Timeout(**API_TIMEOUT),
+    )
+
+
+def make_async_client(api_key: str):
+    """Async counterpart of make_client, for TaskClassifier.aclassify_*."""
+    import anthropic
+    return anthropic.AsyncAnthropic(
+        api_key=api_key,
+        max_retries=API_MAX_RETRIES,
+        timeout=anthropic.Timeout(**API_TIMEOUT),
+    )
+
+
 class TaskClassifier:
-    def __init__(self, client, prompt_builder: PromptBuilder):
+    MODEL = SystemConfig.CLASSIFICATION_MODEL
+    # Inbox items per API call in classify_many: amortizes the round trip while
+    # keeping the full structured results of one chunk well inside max_tokens
+    BATCH_SIZE = 10
+    # Message Batches polling: start short, back off exponentially up to the cap (seconds)
+    BATCH_POLL_INTERVAL = 5.0
+    BATCH_MAX_POLL_INTERVAL = 60.0
+    # Smallest inbox classify_dataset sends through the Message Batches API when asked to
+    BATCH_API_THRESHOLD = 20
+    # Concurrent requests in aclassify_many; keeps bursts under the account's rate limit
+    MAX_CONCURRENCY = 8
+    # Re-triaging a skipped or reopened item with unchanged context answers from memory
+    CACHE_SIZE = 256
+
+    def __init__(self, client, prompt_builder: PromptBuilder, async_client=None,
+                 rate_limiter: Optional[AsyncTokenBucket] = None):
         self.client = client
         self.prompt_builder = prompt_builder
+        # Optional anthropic.AsyncAnthropic for aclassify_* (overlapping network waits)
+        self.async_client = async_client
+        # Optional self-pacing for aclassify_*; 429s that still happen are retried by the SDK (Retry-After aware)
+        self.rate_limiter = rate_limiter
+        # Successful classify_single results, least recently used first (errors are never cached)
+        self._cache: "OrderedDict[str, ClassificationResponse]" = OrderedDict()
+        # Background event loop classify_concurrently submits to, started on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def classify_single(self, request: SingleTaskClassificationRequest,
+                        bypass_cache: bool = False) -> ClassificationResponse:
+        key = self._cache_key(request)
+        cached = None if bypass_cache else self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        blocks = self._triage_blocks(request)
+        prompt = "".join(blocks)
 
-    def classify_single(self, request: SingleTaskClassificationRequest) -> ClassificationResponse:
-        prompt = self.prompt_builder.build_triage_prompt(
-            request.task_text,
-            request.available_projects,
-            request.existing_tags
-        )
+        try:
+            # Use the .parse() method for automatic Pydantic validation
+            response = self.client.beta.messages.parse(**self._triage_params(blocks))
+        except Exception as e:
+            return self._triage_error_response(request, prompt, e)
+        return self._cache_put(key, self._triage_response(prompt, response.parsed_output))
 
-        # Capture the "Form" definition we are sending
-        tool_schema = ClassificationResult.model_json_schema()
+    def classify_single_streaming(self, request: SingleTaskClassificationRequest,
+                                  on_text: Callable[[str], None],
+                                  bypass_cache: bool = False) -> ClassificationResponse:
+        """
+        classify_single, but streams the result JSON as it is generated: on_text gets every text delta
+        so the UI can show progress instead of a bare spinner. Same cache, bypass_cache and error fallback.
+        """
+        key = self._cache_key(request)
+        cached = None if bypass_cache else self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        blocks = self._triage_blocks(request)
+        prompt = "".join(blocks)
 
         try:
-            # Use the .parse() method for automatic Pydantic validation
-            response = self.client.beta.messages.parse(
-                model="claude-haiku-4-5",
-                max_tokens=8024,
-                temperature=0,
-                betas=["structured-outputs-2025-11-13"],
-                messages=[{"role": "user", "content": prompt}],
-                output_format=ClassificationResult,
+            with self.client.beta.messages.stream(**self._triage_params(blocks)) as stream:
+                for text in stream.text_stream:
+                    on_text(text)
+                parsed_result = stream.get_final_message().parsed_output
+        except Exception as e:
+            return self._triage_error_response(request, prompt, e)
+        return self._cache_put(key, self._triage_response(prompt, parsed_result))
+
+    async def aclassify_single(self, request: SingleTaskClassificationRequest,
+                               bypass_cache: bool = False) -> ClassificationResponse:
+        key = self._cache_key(request)
+        cached = None if bypass_cache else self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        blocks = self._triage_blocks(request)
+        prompt = "".join(blocks)
+
+        if self.rate_limiter is not None:
+            # ~4 characters per input token, plus the full output budget
+            await self.rate_limiter.acquire(len(prompt) // 4 + SystemConfig.CLASSIFICATION_MAX_TOKENS)
+
+        try:
+            response = await self.async_client.beta.messages.parse(**self._triage_params(blocks))
+        except Exception as e:
+            return self._triage_error_response(request, prompt, e)
+        return self._cache_put(key, self._triage_response(prompt, response.parsed_output))
+
+    async def aclassify_many(self, requests: List[SingleTaskClassificationRequest],
+                             max_concurrency: int = MAX_CONCURRENCY) -> List[ClassificationResponse]:
+        """Runs aclassify_single for every request, at most max_concurrency in flight. Keeps request order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(request):
+            async with semaphore:
+                return await self.aclassify_single(request)
+
+        # API failures are already error responses; this catches anything raised outside that path
+        # (e.g. while building a prompt) so one bad item cannot sink the whole batch
+        outcomes = await asyncio.gather(*(bounded(r) for r in requests), return_exceptions=True)
+        return [
+            self._triage_error_response(request, "", outcome) if isinstance(outcome, Exception) else outcome
+            for request, outcome in zip(requests, outcomes)
+        ]
+
+    def classify_concurrently(self, requests: List[SingleTaskClassificationRequest],
+                              max_concurrency: int = MAX_CONCURRENCY) -> List[ClassificationResponse]:
+        """
+        Sync entry point for aclassify_many (Streamlit callbacks have no running event loop).
+        Every call runs on the same long-lived loop: the async client's pooled connections belong
+        to the loop that opened them, so a fresh asyncio.run() per call would break the second run.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.aclassify_many(requests, max_concurrency), self._event_loop())
+        return future.result()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:  # Streamlit sessions call in from their own threads
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="TaskClassifier-loop", daemon=True).start()
+            return self._loop
+
+    @classmethod
+    def _cache_key(cls, request: SingleTaskClassificationRequest) -> str:
+        # The context tree changes with any data edit, so a hit always saw the same projects.
+        # Safe to reuse answers because calls run at temperature 0; the model is part of the key.
+        # Tags keep the caller's order: the prompt renders them in that order, so one key = one prompt.
+        payload = json.dumps([cls.MODEL, request.task_text, request.available_projects,
+                              list(request.existing_tags or ())])
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[ClassificationResponse]:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        self._cache.move_to_end(key)
+        # Drafts edit their classification in place; never hand out the stored instance
+        return replace(cached, results=[r.model_copy(deep=True) for r in cached.results])
+
+    def _cache_put(self, key: str, response: ClassificationResponse) -> ClassificationResponse:
+        self._cache[key] = replace(response, results=[r.model_copy(deep=True) for r in response.results])
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return response
+
+    def _triage_blocks(self, request: SingleTaskClassificationRequest) -> Tuple[str, str, str]:
+        """(rules, context, incoming item) of the triage prompt"""
+        rules, context = self.prompt_builder.build_triage_blocks(request.available_projects, request.existing_tags)
+        return rules, context, self.prompt_builder.build_triage_item(request.task_text)
+
+    @staticmethod
+    def _user_message(blocks: Sequence[str]) -> dict:
+        """
+        One content block per prompt part with a cache breakpoint after every part but the last:
+        consecutive calls re-read the static rules (and, until the data changes, the context) from the prompt cache.
+        """
+        *cached, tail = blocks
+        return {
+            "role": "user",
+            "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}} for text in cached]
+                       + [{"type": "text", "text": tail}],
+        }
+
+    @classmethod
+    def _triage_params(cls, blocks: Sequence[str]) -> dict:
+        return dict(
+            model=cls.MODEL,
+            max_tokens=SystemConfig.CLASSIFICATION_MAX_TOKENS,
+            temperature=0,
+            betas=SystemConfig.CLASSIFICATION_BETAS,
+            messages=[cls._user_message(blocks)],
+            output_format=ClassificationResult,
+        )
+
+    @staticmethod
+    def _triage_response(prompt: str, parsed_result: ClassificationResult) -> ClassificationResponse:
+        return ClassificationResponse(
+            results=[parsed_result],
+            prompt_used=prompt,
+            # Capture the "Form" definition we are sending
+            tool_schema=_CLASSIFICATION_SCHEMA,
+            raw_response=parsed_result.model_dump_json()
+        )
+
+    def _triage_error_response(self, request: SingleTaskClassificationRequest, prompt: str,
+                               e: Exception) -> ClassificationResponse:
+        return ClassificationResponse(
+            results=[self._error_result(request.task_text, str(e))],
+            prompt_used=prompt,
+            tool_schema=_CLASSIFICATION_SCHEMA,
+            raw_response=str(e)
+        )
+
+    def classify_many(self, requests: List[SingleTaskClassificationRequest],
+                      batch_size: int = BATCH_SIZE) -> List[ClassificationResponse]:
+        """
+        Classifies several inbox items with one API call per chunk instead of one per item.
+        Consecutive requests sharing a context (projects + tags) go into the same chunk.
+        Returns one response per request, in request order.
+        """
+        # Each item gets a full result's output budget; cap the chunk so the call stays under the ceiling
+        batch_size = max(1, min(batch_size, SystemConfig.CLASSIFICATION_CHUNK_MAX_TOKENS
+                                // SystemConfig.CLASSIFICATION_MAX_TOKENS))
+        responses = []
+        chunk = []
+        for request in requests:
+            if chunk and (len(chunk) == batch_size or not self._same_context(chunk[0], request)):
+                responses += self._classify_chunk(chunk)
+                chunk = []
+            chunk.append(request)
+        if chunk:
+            responses += self._classify_chunk(chunk)
+        return responses
+
+    def classify_dataset(self, request: ClassificationRequest) -> List[ClassificationResponse]:
+        """Classifies every inbox item of request.dataset, one response per item in inbox order."""
+        requests = [
+            SingleTaskClassificationRequest(
+                task_text=text,
+                available_projects=request.available_projects,
+                existing_tags=request.existing_tags
             )
+            for text in request.dataset.inbox_tasks
+        ]
+        # Batch API latency (minutes+) only pays off once the upload is big enough
+        if request.use_batch_api and len(requests) >= self.BATCH_API_THRESHOLD:
+            return self.classify_batch(requests)
+        return self.classify_many(requests)
+
+    def classify_batch(self, requests: List[SingleTaskClassificationRequest],
+                       poll_interval: float = BATCH_POLL_INTERVAL,
+                       max_poll_interval: float = BATCH_MAX_POLL_INTERVAL) -> List[ClassificationResponse]:
+        """
+        Submits one request per item to the Message Batches API and blocks until the batch ends.
+        Half the price of classify_single but with minutes-to-hours latency, so only for bulk runs.
+        """
+        parts = [self._triage_blocks(r) for r in requests]
+        prompts = ["".join(blocks) for blocks in parts]
+        tool_schema = _CLASSIFICATION_SCHEMA
+        # Deferred: the SDK is heavy and only this path needs one of its helpers (clients are injected)
+        from anthropic import transform_schema
+        output_config = {"format": {"type": "json_schema", "schema": transform_schema(ClassificationResult)}}
+        batch_results = {}
 
-            # The SDK returns a parsed object directly
-            parsed_result = response.parsed_output
+        try:
+            batch = self._submit_batch(parts, output_config)
+        except Exception as e:
+            # Nothing was submitted (unsupported model/beta, bad request): classify the normal way
+            logger.warning("Message Batches submission failed, falling back to classify_many: %s", e)
+            return self.classify_many(requests)
 
-            return ClassificationResponse(
-                results=[parsed_result],
+        try:
+            delay = poll_interval
+            while batch.processing_status != "ended":
+                time.sleep(delay)
+                delay = min(delay * 2, max_poll_interval)
+                batch = self.client.beta.messages.batches.retrieve(batch.id)
+
+            for entry in self.client.beta.messages.batches.results(batch.id):
+                batch_results[entry.custom_id] = entry.result
+            error = "no result returned for this item"
+        except Exception as e:
+            # Submitted and billed: report per item rather than classifying everything twice
+            error = str(e)
+
+        responses = []
+        for i, (request, prompt) in enumerate(zip(requests, prompts)):
+            try:
+                result = self._parse_batch_result(batch_results[f"task-{i}"])
+                raw_response = result.model_dump_json()
+            except KeyError:
+                result = self._error_result(request.task_text, error)
+                raw_response = error
+            except Exception as e:
+                result = self._error_result(request.task_text, str(e))
+                raw_response = str(e)
+            responses.append(ClassificationResponse(
+                results=[result],
                 prompt_used=prompt,
                 tool_schema=tool_schema,
-                raw_response=parsed_result.model_dump_json(indent=2)
-            )
+                raw_response=raw_response
+            ))
+        return responses
+
+    def _submit_batch(self, parts: List[Tuple[str, str, str]], output_config: dict):
+        return self.client.beta.messages.batches.create(
+            betas=SystemConfig.CLASSIFICATION_BETAS,
+            requests=[
+                {
+                    "custom_id": f"task-{i}",
+                    "params": {
+                        "model": self.MODEL,
+                        "max_tokens": SystemConfig.CLASSIFICATION_MAX_TOKENS,
+                        "temperature": 0,
+                        "messages": [self._user_message(blocks)],
+                        "output_config": output_config,
+                    },
+                }
+                for i, blocks in enumerate(parts)
+            ],
+        )
+
+    @staticmethod
+    def _parse_batch_result(batch_result) -> ClassificationResult:
+        if batch_result.type != "succeeded":
+            raise ValueError(f"batch request {batch_result.type}")
+        text = next(block.text for block in batch_result.message.content if block.type == "text")
+        return ClassificationResult.model_validate_json(text)
+
+    @staticmethod
+    def _same_context(a: SingleTaskClassificationRequest, b: SingleTaskClassificationRequest) -> bool:
+        return a.available_projects == b.available_projects and a.existing_tags == b.existing_tags
 
+    def _classify_chunk(self, chunk: List[SingleTaskClassificationRequest]) -> List[ClassificationResponse]:
+        first = chunk[0]
+        rules, context = self.prompt_builder.build_triage_blocks(first.available_projects, first.existing_tags)
+        blocks = (rules, context, self.prompt_builder.build_batch_triage_items([r.task_text for r in chunk]))
+        prompt = "".join(blocks)
+        tool_schema = _BATCH_CLASSIFICATION_SCHEMA
+
+        try:
+            response = self.client.beta.messages.parse(**{
+                **self._triage_params(blocks),
+                # One result's budget per item, never past the non-streaming ceiling
+                "max_tokens": min(SystemConfig.CLASSIFICATION_MAX_TOKENS * len(chunk),
+                                  SystemConfig.CLASSIFICATION_CHUNK_MAX_TOKENS),
+                "output_format": BatchClassificationResult,
+            })
+            batch_result: BatchClassificationResult = response.parsed_output
+            by_number = {r.task_number: r for r in batch_result.results}
+            raw_response = batch_result.model_dump_json()
+            error = "no result returned for this item"
         except Exception as e:
-            error_result = ClassificationResult(
-                reasoning=f"AI Error: {str(e)}",
-                classification_type=ClassificationType.TASK,
-                refined_text=request.task_text,
-                suggested_project="Unmatched",
-                confidence=0.0,
-                extracted_tags=[]
-            )
-            return ClassificationResponse(
-                results=[error_result],
+            by_number = {}
+            raw_response = error = str(e)
+
+        return [
+            ClassificationResponse(
+                results=[by_number.get(n) or self._error_result(request.task_text, error)],
                 prompt_used=prompt,
                 tool_schema=tool_schema,
-                raw_response=str(e)
+                raw_response=raw_response
             )
+            for n, request in enumerate(chunk, start=1)
+        ]
+
+    @staticmethod
+    def _error_result(task_text: str, error: str) -> ClassificationResult:
+        return ClassificationResult(
+            reasoning=f"AI Error: {error}",
+            classification_type=ClassificationType.TASK,
+            refined_text=task_text,
+            suggested_project="Unmatched",
+            confidence=0.0,
+            extracted_tags=[]
+        )
 
     def enrich_single_item(self, item_name: str, project_name: str, goal_name: str,
                            project_context_str: str, extra_tags: List[str]) -> EnrichmentResult:
@@ -362,10 +787,10 @@ class TaskClassifier:
         prompt = self.prompt_builder.build_enrichment_prompt(
             item_name, project_name, goal_name, project_context_str, extra_tags
         )
-        tool_schema = EnrichmentResult.model_json_schema()
+        tool_schema = _ENRICHMENT_SCHEMA
 
         response = self.client.beta.messages.parse(
-            model="claude-haiku-4-5",
+            model=self.MODEL,
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}],
             output_format=EnrichmentResult,
@@ -373,7 +798,7 @@ class TaskClassifier:
 
         debug_data = {
             "prompt": prompt,
-            "response": response.parsed_output.model_dump_json(indent=2),
+            "response": response.parsed_output.model_dump_json(),
             "schema": tool_schema
         }
 
@@ -386,10 +811,10 @@ class TaskClassifier:
             target_items_str, project_name, goal_name, project_context_str, extra_tags
         )
 
-        tool_schema = BatchEnrichmentResponse.model_json_schema()
+        tool_schema = _BATCH_ENRICHMENT_SCHEMA
 
         response = self.client.beta.messages.parse(
-            model="claude-haiku-4-5",
+            model=self.MODEL,
             max_tokens=4096,  # Increased token limit for batch
             messages=[{"role": "user", "content": prompt}],
             output_format=BatchEnrichmentResponse,
@@ -1,11 +1,46 @@
-from unittest.mock import MagicMock
-from models.ai_schemas import ClassificationResult, ClassificationType, SmartFilterResult
+import re
+from unittest.mock import MagicMock, AsyncMock
+from models.ai_schemas import (
+    ClassificationResult, ClassificationType, SmartFilterResult,
+    BatchClassificationResult, NumberedClassificationResult
+)
 
 
 class MockAIClient:
     def __init__(self):
         self.beta = MagicMock()
         self.beta.messages.parse.side_effect = self._handle_parse
+        self.beta.messages.batches.create.side_effect = self._handle_batch_create
+        self.beta.messages.batches.retrieve.side_effect = lambda batch_id: self._batch
+        self.beta.messages.batches.results.side_effect = lambda batch_id: iter(self._batch_entries)
+        self.beta.messages.stream.side_effect = self._handle_stream
+        self._batch = None
+        # aclassify_* goes through the same scenarios; AsyncMock makes parse() awaitable
+        self.async_client = MagicMock()
+        self.async_client.beta.messages.parse = AsyncMock(side_effect=self._handle_parse)
+        self._batch_entries = []
+
+    def _handle_stream(self, **kwargs):
+        """Same scenarios as parse(), delivered as a context manager streaming the JSON in two deltas."""
+        parsed = self._handle_parse(**kwargs).parsed_output
+        text = parsed.model_dump_json()
+        stream = MagicMock()
+        stream.text_stream = iter([text[:len(text) // 2], text[len(text) // 2:]])
+        stream.get_final_message.return_value.parsed_output = parsed
+        manager = MagicMock()
+        manager.__enter__.return_value = stream
+        return manager
+
+    def _handle_batch_create(self, requests, **kwargs):
+        """Answers every batch request through the same scenarios as parse(); the batch ends on first poll."""
+        self._batch_entries = []
+        for request in requests:
+            parsed = self._handle_parse(messages=request["params"]["messages"]).parsed_output
+            result = MagicMock(type="succeeded")
+            result.message.content = [MagicMock(type="text", text=parsed.model_dump_json())]
+            self._batch_entries.append(MagicMock(custom_id=request["custom_id"], result=result))
+        self._batch = MagicMock(id="batch-1", processing_status="ended")
+        return MagicMock(id="batch-1", processing_status="in_progress")
 
     def _handle_parse(self, **kwargs):
         """
@@ -14,8 +49,20 @@ class MockAIClient:
         """
         messages = kwargs.get('messages', [])
         user_content = messages[0]['content'] if messages else ""
+        if isinstance(user_content, list):  # Content blocks (cached prefix + item)
+            user_content = "".join(block['text'] for block in user_content)
         content_lower = user_content.lower()
 
+        # --- SCENARIO: BATCH TRIAGE (one result per TASK_N line) ---
+        if kwargs.get('output_format') is BatchClassificationResult:
+            results = []
+            for number, text in re.findall(r'TASK_(\d+): "(.*)"', user_content):
+                single = self._handle_parse(
+                    messages=[{"role": "user", "content": f'INCOMING ITEM: "{text}"'}]
+                ).parsed_output
+                results.append(NumberedClassificationResult(task_number=int(number), **single.model_dump()))
+            return self._wrap_result(BatchClassificationResult(results=results))
+
         # --- SCENARIO 1: TRIAGE (Task/Shopping) ---
         if 'incoming item: "buy milk"' in content_lower:
             return self._wrap_result(ClassificationResult(
@@ -0,0 +1,291 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+from services import PromptBuilder, TaskClassifier, AsyncTokenBucket, make_client, make_async_client
+from models import DatasetContent, ClassificationRequest
+from models.ai_schemas import ClassificationResult, ClassificationType, BatchClassificationResult
+from models.dtos import SingleTaskClassificationRequest
+from tests.mocks import MockAIClient
+
+
+def _request(text, projects="Groceries", tags=None):
+    return SingleTaskClassificationRequest(task_text=text, available_projects=projects, existing_tags=tags or [])
+
+
+def test_classify_many_uses_one_call_per_chunk():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    responses = classifier.classify_many([_request("Buy milk"), _request("http://wiki.com"), _request("Learn guitar someday")])
+
+    assert client.beta.messages.parse.call_count == 1
+    assert client.beta.messages.parse.call_args.kwargs['output_format'] is BatchClassificationResult
+    types = [r.results[0].classification_type for r in responses]
+    assert types == [ClassificationType.SHOPPING, ClassificationType.REFERENCE, ClassificationType.INCUBATE]
+
+
+def test_classify_many_splits_on_batch_size_and_context():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    requests = [_request(f"Task {i}") for i in range(5)] + [_request("Other", projects="Work")]
+    responses = classifier.classify_many(requests, batch_size=2)
+
+    # [0,1] [2,3] [4] [Other] -> the context change closes the last Groceries chunk
+    assert client.beta.messages.parse.call_count == 4
+    assert len(responses) == len(requests)
+
+
+def test_classify_many_keeps_large_chunks_under_the_token_ceiling():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    responses = classifier.classify_many([_request(f"Buy item {i}") for i in range(40)], batch_size=40)
+
+    # 16 items x 1024 tokens fill the 16384-token ceiling: 40 items -> 16 + 16 + 8
+    budgets = [call.kwargs['max_tokens'] for call in client.beta.messages.parse.call_args_list]
+    assert budgets == [16384, 16384, 8192]
+    assert len(responses) == 40
+    assert not any(r.results[0].reasoning.startswith("AI Error") for r in responses)
+
+
+def test_classify_many_falls_back_per_item_on_error():
+    client = MockAIClient()
+    client.beta.messages.parse.side_effect = RuntimeError("overloaded")
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    responses = classifier.classify_many([_request("Buy milk"), _request("Walk dog")])
+
+    assert [r.results[0].refined_text for r in responses] == ["Buy milk", "Walk dog"]
+    assert all(r.results[0].reasoning.startswith("AI Error") for r in responses)
+    assert all(r.results[0].suggested_project == "Unmatched" for r in responses)
+
+
+def test_classify_dataset_uses_batch_api_when_requested():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+    classifier.BATCH_API_THRESHOLD = 2
+    dataset = DatasetContent(inbox_tasks=["Buy milk", "http://wiki.com"])
+
+    with patch("services.services.time.sleep") as sleep:
+        responses = classifier.classify_dataset(
+            ClassificationRequest(dataset=dataset, available_projects="Groceries", use_batch_api=True)
+        )
+
+    assert client.beta.messages.batches.create.call_count == 1
+    assert client.beta.messages.parse.call_count == 0
+    sleep.assert_called_once()
+    types = [r.results[0].classification_type for r in responses]
+    assert types == [ClassificationType.SHOPPING, ClassificationType.REFERENCE]
+
+
+def test_classify_dataset_keeps_small_inboxes_interactive():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+    dataset = DatasetContent(inbox_tasks=["Buy milk"])
+
+    classifier.classify_dataset(ClassificationRequest(dataset=dataset, available_projects="Groceries", use_batch_api=True))
+
+    assert client.beta.messages.batches.create.call_count == 0
+    assert client.beta.messages.parse.call_count == 1
+
+
+def test_classify_batch_falls_back_to_classify_many_when_submission_fails():
+    client = MockAIClient()
+    client.beta.messages.batches.create.side_effect = RuntimeError("model not supported")
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    responses = classifier.classify_batch([_request("Buy milk"), _request("http://wiki.com")])
+
+    assert client.beta.messages.parse.call_count == 1
+    assert [r.results[0].classification_type for r in responses] == [ClassificationType.SHOPPING, ClassificationType.REFERENCE]
+
+
+def test_classify_batch_falls_back_on_errored_entry():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+    client.beta.messages.batches.results.side_effect = lambda batch_id: iter(
+        [MagicMock(custom_id="task-0", result=MagicMock(type="errored"))]
+    )
+
+    responses = classifier.classify_batch([_request("Buy milk"), _request("Walk dog")], poll_interval=0)
+
+    assert responses[0].results[0].reasoning == "AI Error: batch request errored"
+    assert responses[1].results[0].reasoning.startswith("AI Error")
+
+
+def test_classify_concurrently_keeps_request_order():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder(), async_client=client.async_client)
+
+    responses = classifier.classify_concurrently(
+        [_request("Buy milk"), _request("http://wiki.com"), _request("Learn guitar someday")],
+        max_concurrency=2
+    )
+
+    assert client.async_client.beta.messages.parse.await_count == 3
+    types = [r.results[0].classification_type for r in responses]
+    assert types == [ClassificationType.SHOPPING, ClassificationType.REFERENCE, ClassificationType.INCUBATE]
+
+
+def test_classify_concurrently_reuses_one_loop_for_a_pooled_client():
+    client = MockAIClient()
+    loops = set()
+
+    async def pooled_parse(**kwargs):
+        # Like the SDK's httpx pool: connections opened on one loop fail on any other
+        loops.add(asyncio.get_running_loop())
+        if len(loops) > 1:
+            raise RuntimeError("Event loop is closed")
+        return client._handle_parse(**kwargs)
+
+    client.async_client.beta.messages.parse = AsyncMock(side_effect=pooled_parse)
+    classifier = TaskClassifier(client, PromptBuilder(), async_client=client.async_client)
+
+    first = classifier.classify_concurrently([_request("Buy milk")])
+    second = classifier.classify_concurrently([_request("http://wiki.com")])
+
+    assert first[0].results[0].classification_type == ClassificationType.SHOPPING
+    assert second[0].results[0].classification_type == ClassificationType.REFERENCE
+
+
+def test_triage_prompt_tag_list_is_deduplicated_and_stable():
+    builder = PromptBuilder()
+    builder.cache_clear()
+
+    first = builder.build_triage_prompt("Buy milk", "Groceries", ["@Buy", "@Custom"])
+    second = builder.build_triage_prompt("Walk dog", "Groceries", ["@Buy", "@Custom"])
+
+    tags_line = next(line for line in first.splitlines() if "AVAILABLE TAGS: [" in line)
+    assert tags_line.count('"@Buy"') == 1
+    assert tags_line.strip().endswith('"@Custom"]')
+    assert tags_line in second
+
+
+def test_classify_single_reuses_cached_result_unless_bypassed():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    first = classifier.classify_single(_request("Buy milk"))
+    first.results[0].suggested_project = "Edited by draft"
+    second = classifier.classify_single(_request("Buy milk"))
+
+    assert client.beta.messages.parse.call_count == 1
+    assert second.results[0].suggested_project == "Groceries"
+
+    classifier.classify_single(_request("Buy milk"), bypass_cache=True)
+    assert client.beta.messages.parse.call_count == 2
+
+
+def test_classify_single_cache_key_follows_prompt_tag_order():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    classifier.classify_single(_request("Buy milk", tags=["@A", "@B"]))
+    classifier.classify_single(_request("Buy milk", tags=["@B", "@A"]))  # Different prompt, so no hit
+    classifier.classify_single(_request("Buy milk", tags=["@A", "@B"]))
+
+    assert client.beta.messages.parse.call_count == 2
+
+
+def test_classify_single_does_not_cache_errors():
+    client = MockAIClient()
+    client.beta.messages.parse.side_effect = RuntimeError("timeout")
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    assert classifier.classify_single(_request("Buy milk")).results[0].reasoning.startswith("AI Error")
+    client.beta.messages.parse.side_effect = client._handle_parse
+    assert classifier.classify_single(_request("Buy milk")).results[0].suggested_project == "Groceries"
+
+
+def test_triage_message_caches_rules_and_context_separately():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    response = classifier.classify_single(_request("Buy milk", projects="PROJECT: Groceries"))
+
+    rules, context, item = client.beta.messages.parse.call_args.kwargs['messages'][0]['content']
+    assert rules['cache_control'] == context['cache_control'] == {"type": "ephemeral"}
+    assert "cache_control" not in item
+    assert "Groceries" not in rules['text'] and "PROJECT: Groceries" in context['text']
+    assert 'INCOMING ITEM: "Buy milk"' in item['text']
+    assert response.prompt_used == rules['text'] + context['text'] + item['text']
+
+
+def test_unmatched_sentinel_spellings_are_normalized():
+    def result(project):
+        return ClassificationResult(reasoning="r", classification_type=ClassificationType.TASK,
+                                    suggested_project=project, confidence=0.5, refined_text="t")
+
+    assert [result(p).suggested_project for p in ("unmatched", "None", "UnMatched")] == ["Unmatched"] * 3
+    assert result("Groceries").suggested_project == "Groceries"
+
+
+def test_classify_concurrently_isolates_unexpected_failures(monkeypatch):
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder(), async_client=client.async_client)
+    original = classifier.aclassify_single
+
+    async def flaky(request, bypass_cache=False):
+        if request.task_text == "boom":
+            raise ValueError("bad prompt")
+        return await original(request, bypass_cache)
+
+    monkeypatch.setattr(classifier, "aclassify_single", flaky)
+    responses = classifier.classify_concurrently([_request("Buy milk"), _request("boom")])
+
+    assert responses[0].results[0].suggested_project == "Groceries"
+    assert responses[1].results[0].reasoning == "AI Error: bad prompt"
+
+
+def test_classify_single_streaming_forwards_deltas():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+    deltas = []
+
+    response = classifier.classify_single_streaming(_request("Buy milk"), on_text=deltas.append)
+
+    assert len(deltas) == 2
+    assert ClassificationResult.model_validate_json("".join(deltas)) == response.results[0]
+    assert response.results[0].classification_type == ClassificationType.SHOPPING
+
+
+def test_classify_single_streaming_honours_bypass_cache():
+    client = MockAIClient()
+    classifier = TaskClassifier(client, PromptBuilder())
+
+    classifier.classify_single_streaming(_request("Buy milk"), on_text=lambda text: None)
+    classifier.classify_single_streaming(_request("Buy milk"), on_text=lambda text: None)
+    assert client.beta.messages.stream.call_count == 1
+
+    classifier.classify_single_streaming(_request("Buy milk"), on_text=lambda text: None, bypass_cache=True)
+    assert client.beta.messages.stream.call_count == 2
+
+
+def test_token_bucket_paces_requests_beyond_the_budget():
+    bucket = AsyncTokenBucket(rpm=6000, tpm=1_000_000)  # 100 requests/s
+
+    async def acquire_from_empty_bucket():
+        bucket._requests, bucket._updated = 0.0, time.monotonic()
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_from_empty_bucket()) >= 0.009  # Waited for ~1/100 s of refill
+
+
+def test_aclassify_single_acquires_from_rate_limiter():
+    client = MockAIClient()
+    limiter = AsyncTokenBucket(rpm=1000, tpm=1_000_000)
+    classifier = TaskClassifier(client, PromptBuilder(), async_client=client.async_client, rate_limiter=limiter)
+
+    classifier.classify_concurrently([_request("Buy milk"), _request("http://wiki.com")])
+
+    assert limiter._requests < 999  # Two requests paid for
+    assert limiter._tokens < 1_000_000 - 2 * 1024
+
+
+def test_client_factories_set_timeouts_and_retries():
+    for client in (make_client("sk-test"), make_async_client("sk-test")):
+        assert client.max_retries == 3
+        assert client.timeout.connect == 5.0 and client.timeout.read == 300.0
@@ -1,8 +1,13 @@
+import os
+import sys
 import pytest
 import yaml
 from pathlib import Path
 from dataset_io import YamlDatasetLoader, YamlDatasetSaver
+from services import DatasetManager
+from services.repository import YamlRepository
 from models.entities import DatasetContent, Project, ProjectStatus, TaskItem
+from models.dtos import DirtyHint
 import logging
 
 # --- FIXTURES ---
@@ -147,6 +152,31 @@ def test_load_unified_stream_items(loader, yaml_file):
     assert project.items[1].kind == "resource"
     assert project.items[1].name == "Milk"
 
+
+def test_load_interns_item_tags(loader, yaml_file):
+    """Tags and project names read from YAML are interned, so equal strings share one object."""
+    data = {
+        "projects": [
+            {
+                "id": "uuid-1",
+                "name": "Tagged",
+                "items": [
+                    {"kind": "task", "id": "t1", "name": "A", "tags": ["@Errands"]},
+                    {"kind": "task", "id": "t2", "name": "B", "tags": ["@Errands"]},
+                ]
+            }
+        ]
+    }
+
+    with open(yaml_file, 'w') as f:
+        yaml.dump(data, f)
+
+    project = loader.load(yaml_file).projects[0]
+    items = project.items
+
+    assert items[0].tags[0] is items[1].tags[0] is sys.intern("@Errands")
+    assert project.name is sys.intern("Tagged")
+
 def test_save_sorts_projects_correctly(saver, tmp_path):
     """
     Validates that saving the dataset reorders projects based on
@@ -182,6 +212,90 @@ def test_save_sorts_projects_correctly(saver, tmp_path):
     assert saved_projects[1]['name'] == "First"
     assert saved_projects[2]['name'] == "Second"
 
+    # Only the serialized copy is sorted: the repository's indexes depend on the in-memory order
+    assert content.projects == [p1, p3, p2]
+
+def test_save_with_dirty_hint_reserializes_only_dirty_projects(saver, tmp_path):
+    """
+    Validates that a partial save reuses the previous dump for projects
+    outside the hint, and re-dumps the ones named in it.
+    """
+    clean = Project(id="1", name="Clean", sort_order=1.0)
+    dirty = Project(id="2", name="Dirty", sort_order=2.0)
+    content = DatasetContent(projects=[clean, dirty], inbox_tasks=["Old"])
+    dumps = {}
+    saver.save(tmp_path, content, project_dumps=dumps)  # Full dump primes the cache
+
+    # Unreported edit: proves the clean project's cached dump is reused
+    clean.name = "Not Reported"
+    dirty.name = "Renamed"
+    content.inbox_tasks.append("New")
+    saver.save(tmp_path, content, dirty=DirtyHint(projects={"2"}, inbox=True), project_dumps=dumps)
+
+    with open(tmp_path / "dataset.yaml", 'r') as f:
+        saved_data = yaml.safe_load(f)
+
+    assert list(saved_data) == ["goals", "projects", "inbox_tasks"]
+    assert [p['name'] for p in saved_data['projects']] == ["Clean", "Renamed"]
+    assert saved_data['inbox_tasks'] == ["Old", "New"]
+
+    # A full hint rewrites everything
+    saver.save(tmp_path, content, dirty=DirtyHint(projects=None), project_dumps=dumps)
+    with open(tmp_path / "dataset.yaml", 'r') as f:
+        assert yaml.safe_load(f)['projects'][0]['name'] == "Not Reported"
+
+def test_partial_saves_do_not_share_dumps_across_sessions(tmp_path):
+    """
+    Validates that two repositories over one shared DatasetManager (one per Streamlit
+    session) never reuse each other's project dumps: the last save matches its own data.
+    """
+    dm = DatasetManager(base_path=tmp_path)
+    dm.save_dataset("home", DatasetContent(projects=[
+        Project(id="a", name="Kitchen", sort_order=1.0), Project(id="b", name="Garden", sort_order=2.0)
+    ]))
+    session_a = YamlRepository(dm, "home")
+    session_b = YamlRepository(dm, "home")
+
+    session_a.find_project("a").name = "Kitchen Remodel"
+    session_a.mark_dirty("a")
+    session_a.save()
+    session_b.find_project("b").description = "Spring planting"
+    session_b.mark_dirty("b")
+    session_b.save()
+
+    with open(tmp_path / "home" / "dataset.yaml", 'r') as f:
+        saved = yaml.safe_load(f)['projects']
+    assert [p['name'] for p in saved] == ["Kitchen", "Garden"]
+    assert saved[1]['description'] == "Spring planting"
+
+def test_load_prefers_fresh_json_cache(saver, loader, tmp_path):
+    """
+    Validates that a save leaves a JSON sidecar the loader uses, and that a
+    hand-edited YAML or a restored older copy (old mtime kept) wins over it.
+    """
+    task = TaskItem(name="Call plumber", tags=["@Phone"])
+    saver.save(tmp_path, DatasetContent(projects=[Project(id="1", name="Home", items=[task])], inbox_tasks=["Idea"]))
+    yaml_path = tmp_path / "dataset.yaml"
+
+    loaded = loader.load(yaml_path)
+    assert (tmp_path / "dataset.json").exists()
+    assert loaded.projects[0].items[0].name == "Call plumber"
+    assert loaded.inbox_tasks == ["Idea"]
+
+    with open(yaml_path, 'w') as f:
+        yaml.dump({'projects': [{'id': 1, 'name': "Edited by hand"}]}, f)
+    json_mtime = (tmp_path / "dataset.json").stat().st_mtime_ns
+    os.utime(yaml_path, ns=(json_mtime + 1, json_mtime + 1))
+
+    assert loader.load(yaml_path).projects[0].name == "Edited by hand"
+
+    saver.save(tmp_path, DatasetContent(projects=[Project(id="1", name="Saved later")]))
+    with open(yaml_path, 'w') as f:
+        yaml.dump({'projects': [{'id': 1, 'name': "Restored backup"}]}, f)
+    os.utime(yaml_path, ns=(1, 1))  # e.g. cp -p of a file older than the sidecar
+
+    assert loader.load(yaml_path).projects[0].name == "Restored backup"
+
 def test_load_file_not_found(loader, tmp_path):
     """Validates error handling for missing files."""
     missing_file = tmp_path / "non_existent.yaml"
@@ -228,4 +342,57 @@ def test_load_raises_and_logs_on_invalid_project_data(loader, yaml_file, caplog)
 
     # Verify Logging
     assert "Failed to parse project index 1" in caplog.text
-    assert "Unknown" in caplog.text
\ No newline at end of file
+    assert "Unknown" in caplog.text
+
+def test_list_datasets_refreshes_when_folders_change(tmp_path):
+    """Validates the memoized listing picks up added datasets and ignores plain files."""
+    dm = DatasetManager(base_path=tmp_path)
+    (tmp_path / "alpha").mkdir()
+    (tmp_path / "notes.txt").write_text("not a dataset")
+
+    assert dm.list_datasets() == ["alpha"]
+
+    (tmp_path / "beta").mkdir()
+    assert sorted(dm.list_datasets()) == ["alpha", "beta"]
+
+
+@pytest.mark.parametrize("name, valid", [
+    ("home_renovation", True), ("q3-2025", True), ("ünïcode", True),
+    ("has space", False), ("a.b", False), ("___", False),
+])
+def test_dataset_name_validation(tmp_path, name, valid):
+    """Validates the allowed character set for dataset folder names."""
+    assert (DatasetManager(base_path=tmp_path)._validate_dataset_name(name) == "") is valid
+
+
+def test_dataset_manager_creates_base_folder_on_first_save(tmp_path):
+    """Validates that constructing a manager touches nothing and saving creates the folders."""
+    base = tmp_path / "datasets"
+    dm = DatasetManager(base_path=base)
+
+    assert not base.exists()
+    assert dm.list_datasets() == []
+
+    assert dm.save_dataset("first", DatasetContent())["success"] is True
+    assert dm.list_datasets() == ["first"]
+
+
+def test_load_dataset_reuses_parse_until_file_changes(tmp_path, monkeypatch):
+    """Validates a YAML parse leaves a sidecar that serves later loads until the YAML changes."""
+    dm = DatasetManager(base_path=tmp_path)
+    dm.save_dataset("home", DatasetContent(inbox_tasks=["Buy milk"]))
+    (tmp_path / "home" / "dataset.json").unlink()  # As for a dataset written by hand
+    parses = []
+    original_load = yaml.load
+    monkeypatch.setattr(yaml, "load", lambda *a, **kw: parses.append(a) or original_load(*a, **kw))
+
+    first = dm.load_dataset("home")
+    first.inbox_tasks.append("Edited in memory")
+    second = dm.load_dataset("home")
+
+    assert len(parses) == 1
+    assert second.inbox_tasks == ["Buy milk"]
+
+    dm.save_dataset("home", DatasetContent(inbox_tasks=["Walk dog"]))
+    assert dm.load_dataset("home").inbox_tasks == ["Walk dog"]
+    assert len(parses) == 1
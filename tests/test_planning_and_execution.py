@@ -1,10 +1,11 @@
 import pytest
 from unittest.mock import MagicMock
-from services.repository import PlanningService, ExecutionService, YamlRepository
+from services.repository import PlanningService, ExecutionService, YamlRepository, ScanIndex
 from models.entities import (
     Project, Goal, TaskItem, ResourceItem, ReferenceItem,
     ResourceType, ProjectStatus
 )
+from models.ai_schemas import BatchEnrichmentItem, BatchEnrichmentResponse
 
 
 # --- FIXTURES ---
@@ -18,6 +19,8 @@ def mock_repo():
 
     # Mock find methods
     repo.find_project.side_effect = lambda pid: next((p for p in repo.data.projects if p.id == pid), None)
+    repo.find_goal.side_effect = lambda gid: next((g for g in repo.data.goals if g.id == gid), None)
+    repo.register_goal.side_effect = repo.data.goals.append
 
     def find_item_side_effect(iid):
         for p in repo.data.projects:
@@ -27,6 +30,7 @@ def mock_repo():
         return None
 
     repo.find_item.side_effect = find_item_side_effect
+    repo.get_scan_index.side_effect = lambda: ScanIndex.build(repo.data.projects)
 
     return repo
 
@@ -48,7 +52,16 @@ def test_create_goal(planning_service, mock_repo):
 
     assert len(mock_repo.data.goals) == 1
     assert mock_repo.data.goals[0].name == "New Goal"
-    mock_repo.mark_dirty.assert_called()
+    mock_repo.register_goal.assert_called_once_with(goal)  # Indexes and marks dirty
+
+
+def test_get_all_goals_returns_read_only_snapshot(planning_service, mock_repo):
+    mock_repo.data.goals = [Goal(id="g1", name="G1")]
+
+    goals = planning_service.get_all_goals()
+
+    assert isinstance(goals, tuple)
+    assert goals[0].id == "g1"
 
 
 def test_add_manual_item_task(planning_service, mock_repo):
@@ -148,6 +161,46 @@ def test_move_project_down_at_bottom(planning_service, mock_repo):
     assert p2.sort_order == 2.0
 
 
+def test_enrich_project_targets_only_bare_open_items(planning_service, mock_repo):
+    """Only untagged, open items without a duration are sent; durations apply to tasks only."""
+    bare_task = TaskItem(name="Bare Task")
+    bare_res = ResourceItem(name="Bare Resource")
+    skipped = [
+        TaskItem(name="Timed", duration="15min"),
+        TaskItem(name="Done", is_completed=True),
+        ResourceItem(name="Bought", is_acquired=True),
+        TaskItem(name="Tagged", tags=["@home"]),
+    ]
+    mock_repo.data.projects = [Project(id="1", name="P1", items=[bare_task, bare_res] + skipped)]
+
+    classifier = MagicMock()
+    classifier.enrich_batch_items.return_value = (
+        BatchEnrichmentResponse(items=[
+            BatchEnrichmentItem(id=bare_task.id, reasoning="", extracted_tags=["@computer"], estimated_duration="5min"),
+            BatchEnrichmentItem(id=bare_res.id, reasoning="", extracted_tags=["@errands"], estimated_duration="5min"),
+        ]),
+        {},
+    )
+
+    count, _ = planning_service.enrich_project("1", classifier)
+
+    sent = classifier.enrich_batch_items.call_args[0][0]
+    assert sent.count("ID: ") == 2
+    assert count == 2
+    assert bare_task.tags == ["@computer"] and bare_task.duration == "5min"
+    assert bare_res.tags == ["@errands"] and not hasattr(bare_res, "duration")
+    mock_repo.mark_dirty.assert_called()
+
+
+def test_enrich_project_skips_classifier_when_nothing_to_enrich(planning_service, mock_repo):
+    mock_repo.data.projects = [Project(id="1", name="P1", items=[TaskItem(name="Tagged", tags=["@home"])])]
+    classifier = MagicMock()
+
+    assert planning_service.enrich_project("1", classifier) == (0, {})
+    classifier.enrich_batch_items.assert_not_called()
+    mock_repo.mark_dirty.assert_not_called()
+
+
 # --- EXECUTION SERVICE TESTS ---
 
 def test_complete_item_polymorphic(execution_service, mock_repo):
@@ -178,6 +231,33 @@ def test_toggle_resource_status(execution_service, mock_repo):
     assert res.is_acquired is False
 
 
+def test_toggle_resource_status_same_state_is_noop(execution_service, mock_repo):
+    res = ResourceItem(name="Res", is_acquired=True)
+    mock_repo.data.projects = [Project(id="1", name="P1", items=[res])]
+
+    execution_service.toggle_resource_status(res.id, True)
+
+    assert res.is_acquired is True
+    mock_repo.mark_dirty.assert_not_called()
+
+
+def test_set_completed_is_idempotent(execution_service, mock_repo):
+    """A double-fired completion changes state once and marks dirty once."""
+    task = TaskItem(name="Task")
+    res = ResourceItem(name="Res")
+    ref = ReferenceItem(name="Ref")
+    mock_repo.data.projects = [Project(id="1", name="P1", items=[task, res, ref])]
+
+    assert execution_service.set_completed(task.id, True) is True
+    assert execution_service.set_completed(task.id, True) is False
+    assert execution_service.set_completed(res.id, True) is True
+    assert execution_service.set_completed(ref.id, True) is False
+
+    assert task.is_completed is True
+    assert res.is_acquired is True
+    assert mock_repo.mark_dirty.call_count == 2
+
+
 def test_toggle_resource_status_invalid_type(execution_service, mock_repo):
     task = TaskItem(name="Task")
     proj = Project(id="1", name="P1", items=[task])
@@ -207,4 +287,30 @@ def test_get_aggregated_shopping_list(execution_service, mock_repo):
     items = shopping_list["Grocery"]
     assert len(items) == 1
     assert items[0][0] == r1  # Only Milk should be there
-    assert items[0][1] == "Active Proj"  # Project Name check
\ No newline at end of file
+    assert items[0][1] == "Active Proj"  # Project Name check
+
+def test_get_next_actions_filters_completed_and_inactive(execution_service, mock_repo):
+    """Only open tasks of ACTIVE projects, optionally narrowed by context tag."""
+    open_task = TaskItem(name="Open", tags=["@Errands"])
+    other_task = TaskItem(name="Other", tags=["@Maker-Code"])
+    done_task = TaskItem(name="Done", is_completed=True)
+    held_task = TaskItem(name="Held")
+
+    p1 = Project(id="1", name="Active", items=[open_task, other_task, done_task])
+    p2 = Project(id="2", name="Held", status=ProjectStatus.ON_HOLD, items=[held_task])
+    mock_repo.data.projects = [p1, p2]
+
+    assert execution_service.get_next_actions() == [open_task, other_task]
+    assert execution_service.get_next_actions(context_filter="@Errands") == [open_task]
+    assert execution_service.get_next_actions(context_filter="@Unknown") == []
+
+
+def test_projects_for_goal_and_orphans(planning_service, mock_repo):
+    p1 = Project(id="1", name="P1", goal_id="g1")
+    p2 = Project(id="2", name="P2", goal_id=None)
+    p3 = Project(id="3", name="P3", goal_id="g1", status=ProjectStatus.COMPLETED)
+    mock_repo.data.projects = [p1, p2, p3]
+
+    assert planning_service.get_projects_for_goal("g1") == [p1, p3]
+    assert planning_service.get_projects_for_goal("g404") == []
+    assert planning_service.get_orphaned_projects() == [p2]
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock
 from services.repository import (
     TriageService, PlanningService, ExecutionService,
-    YamlRepository, DraftItem
+    YamlRepository, DraftItem, ScanIndex
 )
 from models.entities import (
     Project, TaskItem, ResourceItem, ReferenceItem, ResourceType
@@ -36,8 +36,16 @@ def mock_repo():
                     return item
         return None
 
+    def remove_inbox_item_side_effect(text):
+        if text in repo.data.inbox_tasks:
+            repo.data.inbox_tasks.remove(text)
+            return True
+        return False
+
     repo.find_project.side_effect = find_project_side_effect
     repo.find_item.side_effect = find_item_side_effect
+    repo.remove_inbox_item.side_effect = remove_inbox_item_side_effect
+    repo.get_scan_index.side_effect = lambda: ScanIndex.build(repo.data.projects)
 
     return repo
 
@@ -86,6 +94,22 @@ def test_draft_to_entity_shopping_polymorphic():
     assert entity.cost_estimate == 5.99
 
 
+def test_draft_item_is_slotted():
+    """DraftItem uses __slots__: no per-instance __dict__, no stray attributes."""
+    result = ClassificationResult(
+        classification_type=ClassificationType.TASK,
+        suggested_project="P1",
+        confidence=1.0,
+        reasoning="Test",
+        refined_text="Task"
+    )
+    draft = DraftItem(source_text="Raw", classification=result)
+
+    assert not hasattr(draft, "__dict__")
+    with pytest.raises(AttributeError):
+        draft.typo_field = "x"
+
+
 # --- TEST: TRIAGE SERVICE ---
 
 def test_triage_delete_inbox_item(mock_repo):
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
-from services.repository import PlanningService, ExecutionService, TriageService, YamlRepository, DraftItem
+from services.repository import PlanningService, ExecutionService, TriageService, YamlRepository, DraftItem, ScanIndex
 
 # --- CORRECTED IMPORTS ---
 from models.entities import Project, TaskItem, ResourceItem
@@ -26,6 +26,15 @@ def mock_repo():
     repo.find_project.side_effect = lambda pid: next((p for p in repo.data.projects if p.id == pid), None)
     repo.find_item.return_value = None  # Default
 
+    def remove_inbox_item_side_effect(text):
+        if text in repo.data.inbox_tasks:
+            repo.data.inbox_tasks.remove(text)
+            return True
+        return False
+
+    repo.remove_inbox_item.side_effect = remove_inbox_item_side_effect
+    repo.get_scan_index.side_effect = lambda: ScanIndex.build(repo.data.projects)
+
     return repo
 
 
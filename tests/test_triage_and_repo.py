@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from services.repository import TriageService, YamlRepository, DraftItem
-from models.entities import Project, TaskItem, DatasetContent
+from services.repository import TriageService, PlanningService, ExecutionService, YamlRepository, DraftItem
+from models.entities import Project, Goal, ProjectStatus, TaskItem, ResourceItem, DatasetContent
 from models.ai_schemas import ClassificationResult, ClassificationType
+from models.dtos import DirtyHint
 
 
 # --- FIXTURES ---
@@ -47,6 +48,25 @@ def test_repo_dirty_flag_logic(repo):
     repo.dm.save_dataset.assert_called_once()
 
 
+def test_repo_save_passes_dirty_hint(repo, triage_service):
+    """Save hands the accumulated change scope to the dataset manager, then resets it."""
+    task = TaskItem(name="T")
+    repo.register_project(Project(id="1", name="P1", items=[task]))
+    repo.register_project(Project(id="2", name="P2"))
+    repo.save()
+
+    ExecutionService(repo).set_completed(task.id, True)
+    triage_service.add_to_inbox("Call Mom")
+    repo.save()
+
+    hint = repo.dm.save_dataset.call_args.kwargs["dirty"]
+    assert hint == DirtyHint(projects={"1"}, inbox=True, goals=False)
+
+    repo.mark_dirty()  # No hint: unknown scope
+    repo.save()
+    assert repo.dm.save_dataset.call_args.kwargs["dirty"].is_full
+
+
 def test_repo_indexing_and_retrieval(repo):
     """Verify O(1) lookup index works"""
     # Setup Data
@@ -76,6 +96,35 @@ def test_repo_find_project_helpers(repo):
     assert repo.find_project_by_name("Gamma") is None
 
 
+def test_repo_register_project_updates_indexes(repo):
+    """Verify newly registered projects are immediately findable by id and name"""
+    task = TaskItem(name="Carried Over")
+    proj = Project(id="30", name="Gamma", items=[task])
+
+    repo.register_project(proj)
+
+    assert proj in repo.data.projects
+    assert repo.find_project("30") is proj
+    assert repo.find_project_by_name("Gamma") is proj
+    assert repo.find_item(task.id) is task
+    assert repo.is_dirty is True
+
+
+def test_repo_register_goal_updates_index(repo):
+    """Verify goals are indexed on load and on registration"""
+    loaded = Goal(id="g1", name="Loaded")
+    repo.data.goals = [loaded]
+
+    created = Goal(id="g2", name="Created")
+    repo.register_goal(created)
+
+    assert repo.find_goal("g1") is loaded
+    assert repo.find_goal("g2") is created
+    assert repo.find_goal("missing") is None
+    assert repo.data.goals == [loaded, created]
+    assert repo.is_dirty is True
+
+
 # --- TESTS: TriageService ---
 
 def test_skip_inbox_item_success(triage_service, repo):
@@ -101,6 +150,24 @@ def test_skip_inbox_item_not_found(triage_service, repo):
     triage_service.skip_inbox_item("Ghost Item")
 
     assert repo.data.inbox_tasks == ["Item A"]
+    assert repo.is_dirty is False
+
+
+def test_inbox_membership_tracks_duplicates(repo):
+    """
+    Scenario: The same text was captured twice.
+    Expected: Removing one copy keeps the other visible to membership checks.
+    """
+    repo.add_inbox_item("Call mom")
+    repo.add_inbox_item("Call mom")
+
+    assert repo.remove_inbox_item("Call mom") is True
+    assert repo.has_inbox_item("Call mom") is True
+    assert repo.data.inbox_tasks == ["Call mom"]
+
+    assert repo.remove_inbox_item("Call mom") is True
+    assert repo.has_inbox_item("Call mom") is False
+    assert repo.remove_inbox_item("Call mom") is False
 
 
 def test_create_project_from_draft_success(triage_service, repo):
@@ -201,4 +268,176 @@ def test_apply_draft_invalid_project(triage_service, repo):
     draft = DraftItem("Task", result)
 
     with pytest.raises(ValueError, match="Target project not found"):
-        triage_service.apply_draft(draft)
\ No newline at end of file
+        triage_service.apply_draft(draft)
+
+def test_get_inbox_items_returns_read_only_snapshot(triage_service, repo):
+    """
+    Scenario: A caller tries to mutate the list returned by get_inbox_items.
+    Expected: The snapshot is immutable; the repository data is untouched.
+    """
+    repo.data.inbox_tasks = ["Item A", "Item B"]
+
+    items = triage_service.get_inbox_items()
+
+    assert items == ("Item A", "Item B")
+    with pytest.raises(AttributeError):
+        items.append("Sneaky")
+    assert repo.data.inbox_tasks == ["Item A", "Item B"]
+
+
+def test_scan_index_rebuilt_after_mutation(repo):
+    """
+    Scenario: The column snapshot is read, then an item changes state.
+    Expected: The next read reflects the change (snapshot keyed on repo version).
+    """
+    task = TaskItem(name="Open Task")
+    repo.data.projects = [Project(id="1", name="P1", items=[task])]
+
+    assert repo.get_scan_index().task_completed == [False]
+    assert repo.get_scan_index() is repo.get_scan_index()  # Cached while clean
+
+    task.is_completed = True
+    repo.mark_dirty()
+
+    assert repo.get_scan_index().task_completed == [True]
+
+
+def test_projects_by_goal_follows_relinking(repo):
+    """Re-linking a project (which marks the repo dirty) moves it between goal buckets."""
+    proj = Project(id="1", name="P1", goal_id=None)
+    repo.register_project(proj)
+    assert repo.get_scan_index().projects_by_goal[None] == [proj]
+
+    proj.goal_id = "g1"
+    repo.mark_dirty()
+
+    index = repo.get_scan_index()
+    assert index.projects_by_goal["g1"] == [proj]
+    assert None not in index.projects_by_goal
+
+
+def test_open_tasks_view_invalidated_by_completion(repo):
+    """The per-context open-task view is reused until an item is completed."""
+    home = TaskItem(name="Vacuum", tags=["@home"])
+    work = TaskItem(name="Email", tags=["@work"])
+    repo.register_project(Project(id="1", name="P1", items=[home, work]))
+    execution = ExecutionService(repo)
+
+    assert execution.get_next_actions("@home") == [home]
+    assert repo.get_scan_index().open_tasks("@home") is repo.get_scan_index().open_tasks("@home")
+
+    execution.complete_item(home.id)
+
+    assert execution.get_next_actions("@home") == []
+    assert execution.get_next_actions() == [work]
+
+
+def test_shopping_list_cached_until_resource_toggled(repo):
+    """Back-to-back shopping list reads share one scan; acquiring an item refreshes it."""
+    milk = ResourceItem(name="Milk", store="Grocery")
+    repo.register_project(Project(id="1", name="P1", items=[milk]))
+    execution = ExecutionService(repo)
+
+    first = execution.get_shopping_list()
+    assert execution.get_aggregated_shopping_list() is first
+    assert first["Grocery"] == ((milk, "P1"),)
+    with pytest.raises(KeyError):
+        first["Hardware"]
+    with pytest.raises(TypeError):
+        first["Grocery"] = ()  # Shared snapshot: callers cannot corrupt it
+
+    execution.toggle_resource_status(milk.id, True)
+
+    assert execution.get_shopping_list() == {}
+
+
+def test_open_tasks_partitioned_per_project(repo):
+    """Every project gets its incomplete tasks, whatever its status; resources stay out."""
+    open_task = TaskItem(name="Open")
+    done_task = TaskItem(name="Done", is_completed=True)
+    repo.register_project(Project(id="1", name="P1", status=ProjectStatus.COMPLETED,
+                                  items=[open_task, done_task, ResourceItem(name="Milk")]))
+    repo.register_project(Project(id="2", name="P2"))
+
+    index = repo.get_scan_index()
+
+    assert index.open_tasks_by_project == {"1": [open_task], "2": []}
+    assert index.tasks == []  # Completed project: not a next action
+
+
+def test_context_tree_lists_only_active_items(repo, triage_service):
+    """Completed tasks and acquired resources are left out of the AI context tree."""
+    repo.register_project(Project(id="1", name="Errands", items=[
+        TaskItem(name="Call Bank", tags=["@phone"], duration="5min"),
+        TaskItem(name="Old Chore", is_completed=True),
+        ResourceItem(name="Milk", store="Grocery"),
+        ResourceItem(name="Bread", store="Grocery", is_acquired=True),
+    ]))
+
+    tree = triage_service.build_full_context_tree()
+
+    assert "- Call Bank: 5min, [@phone]" in tree
+    assert "- Milk: Grocery (Resource)" in tree
+    assert "Old Chore" not in tree
+    assert "Bread" not in tree
+
+
+def test_context_tree_groups_projects_by_goal_in_sort_order(repo, triage_service):
+    """Active projects render under their goal in sort_order; orphans go to Maintenance."""
+    repo.data.goals = [Goal(id="g1", name="Health")]
+    repo.data.projects = [
+        Project(id="1", name="Second", goal_id="g1", sort_order=2.0),
+        Project(id="2", name="First", goal_id="g1", sort_order=1.0),
+        Project(id="3", name="Stray"),
+        Project(id="4", name="Shelved", goal_id="g1", status=ProjectStatus.ON_HOLD),
+    ]
+
+    tree = triage_service.build_full_context_tree()
+
+    assert tree.index("PROJECT: First") < tree.index("PROJECT: Second") < tree.index("GOAL: Maintenance")
+    assert tree.index("GOAL: Maintenance") < tree.index("PROJECT: Stray")
+    assert "Shelved" not in tree
+
+
+def test_context_tree_is_reused_until_data_changes(repo, triage_service):
+    """Repeated triage calls share one rendering; a mutation re-renders it."""
+    repo.register_project(Project(id="1", name="Errands", items=[TaskItem(name="Call Bank")]))
+
+    first = triage_service.build_full_context_tree()
+    assert triage_service.build_full_context_tree() is first
+
+    repo.register_project(Project(id="2", name="Garden"))
+    assert "PROJECT: Garden" in triage_service.build_full_context_tree()
+
+
+def test_batch_defers_dirty_flag_until_outermost_exit(repo):
+    """Nested batches settle the dirty flag once; read models still see every mutation."""
+    with repo.batch():
+        with repo.batch():
+            repo.register_project(Project(id="1", name="P1", items=[TaskItem(name="T")]))
+        assert repo.is_dirty is False
+        assert len(repo.get_scan_index().tasks) == 1  # Version already bumped
+
+    assert repo.is_dirty is True
+
+
+def test_batch_without_mutation_stays_clean(repo):
+    with repo.batch():
+        repo.find_project("missing")
+
+    assert repo.is_dirty is False
+
+
+def test_move_project_reorders_cached_goal_bucket(repo):
+    """The ordered sibling bucket is reused while clean and re-sorted after a move."""
+    first = Project(id="1", name="First", goal_id="g1", sort_order=1.0)
+    second = Project(id="2", name="Second", goal_id="g1", sort_order=2.0)
+    repo.register_project(second)
+    repo.register_project(first)
+    index = repo.get_scan_index()
+    assert index.ordered_projects("g1") == [first, second]
+    assert index.ordered_projects("g1") is index.ordered_projects("g1")
+
+    PlanningService(repo).move_project("2", "up")
+
+    assert repo.get_scan_index().ordered_projects("g1") == [second, first]
@@ -13,7 +13,7 @@ def render_coach_view(analytics_service: AnalyticsService, repo: YamlRepository)
     # Time Forecasting Section
     st.header("⏱️ Project Time Forecasts")
     
-    active_projects = [p for p in repo.data.projects if p.status == ProjectStatus.ACTIVE]
+    active_projects = [p for p in repo.data.projects if p.status is ProjectStatus.ACTIVE]
     
     if not active_projects:
         st.info("No active projects to forecast.")
@@ -28,8 +28,7 @@ def render_coach_view(analytics_service: AnalyticsService, repo: YamlRepository)
                     st.metric("Est. Time", estimate)
                 
                 # Show incomplete tasks count
-                from models.entities import TaskItem
-                incomplete = [item for item in project.items if isinstance(item, TaskItem) and not item.is_completed]
+                incomplete = repo.get_scan_index().open_tasks_by_project.get(project.id, ())
                 if incomplete:
                     st.caption(f"{len(incomplete)} incomplete task(s)")
                 else:
@@ -66,12 +65,11 @@ def render_coach_view(analytics_service: AnalyticsService, repo: YamlRepository)
     # Quick Stats
     st.header("📈 Quick Stats")
     
-    from models.entities import TaskItem
     all_tasks = []
     completed_tasks = []
     for project in repo.data.projects:
         for item in project.items:
-            if isinstance(item, TaskItem):
+            if item.kind == 'task':
                 all_tasks.append(item)
                 if item.is_completed:
                     completed_tasks.append(item)
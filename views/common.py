@@ -64,30 +64,34 @@ def inject_custom_css():
 
 # --- DEBUG LOGGING UTILITY ---
 def log_action(action: str, details: str):
-    logger.info(f"ACTION: {action} - {details}")
+    logger.info("ACTION: %s - %s", action, details)
 
 def log_state(label: str, data):
-    logger.debug(f"STATE: {label} - {data}")
+    logger.debug("STATE: %s - %s", label, data)
 
 def debug_log(func):
-    """Decorator to print function calls, args, and execution time to stdout."""
+    """Decorator to log function calls, args, and execution time at DEBUG level."""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        # repr() of args/results is the expensive part: skip it entirely unless DEBUG is on
+        if not logger.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+
         arg_str = ", ".join([repr(a) for a in args])
         kwarg_str = ", ".join([f"{k}={v!r}" for k, v in kwargs.items()])
         all_args = ", ".join(filter(None, [arg_str, kwarg_str]))
         if len(all_args) > 100: all_args = all_args[:97] + "..."
 
-        print(f"➡️  CALL: {func.__name__}({all_args})")
-        start_time = time.time()
+        logger.debug("CALL: %s(%s)", func.__name__, all_args)
+        start_time = time.perf_counter()
         try:
             result = func(*args, **kwargs)
-            elapsed = (time.time() - start_time) * 1000
+            elapsed = (time.perf_counter() - start_time) * 1000
             res_str = repr(result)
             if len(res_str) > 100: res_str = res_str[:97] + "..."
-            print(f"✅  RETURN: {func.__name__} in {elapsed:.2f}ms -> {res_str}")
+            logger.debug("RETURN: %s in %.2fms -> %s", func.__name__, elapsed, res_str)
             return result
         except Exception as e:
-            print(f"❌  ERROR in {func.__name__}: {str(e)}")
+            logger.debug("ERROR in %s: %s", func.__name__, e)
             raise e
-    return wrapper
\ No newline at end of file
+    return wrapper
@@ -94,7 +94,7 @@ def render_execution_view(execution_service: ExecutionService, analytics_service
 
             if is_done:
                 logger.info(f"Completing task: {task.name}")
-                execution_service.complete_item(task.id)
+                execution_service.set_completed(task.id, True)  # Idempotent on double-fire
                 st.toast(f"Completed: {task.name}")
                 if is_filtered_view:
                     st.session_state.smart_results = [t for t in st.session_state.smart_results if t.id != task.id]
@@ -3,7 +3,7 @@ from services.repository import TriageService, YamlRepository, DraftItem
 from services import TaskClassifier
 from models.dtos import SingleTaskClassificationRequest
 from models.ai_schemas import ClassificationType
-from models.entities import SystemConfig, TaskItem
+from models.entities import SystemConfig
 from views.common import log_action, log_state, set_debug_state
 from views.components import render_debug_panel
 
@@ -32,7 +32,7 @@ def render_triage_view(triage_service: TriageService, classifier: TaskClassifier
 
     # Progress Bar
     total_tasks = len(inbox_items) + sum(
-        len([item for item in p.items if isinstance(item, TaskItem)])
+        sum(1 for item in p.items if item.kind == 'task')
         for p in repo.data.projects
     )
     st.progress((total_tasks - len(inbox_items)) / total_tasks if total_tasks > 0 else 1.0)
@@ -54,8 +54,20 @@ def render_triage_view(triage_service: TriageService, classifier: TaskClassifier
                 existing_tags=db_tags
             )
 
-            # 2. Get Classification
-            response = classifier.classify_single(req)
+            # 2. Get Classification (the JSON is shown as it streams in)
+            stream_box = st.empty()
+            streamed = []
+
+            def _show_progress(text: str):
+                streamed.append(text)
+                stream_box.code("".join(streamed), language="json")
+
+            # A retry asks the model again instead of replaying a cached answer
+            response = classifier.classify_single_streaming(
+                req, on_text=_show_progress,
+                bypass_cache=st.session_state.pop('force_fresh_analysis', False)
+            )
+            stream_box.empty()
             result = response.results[0]
 
             # 3. Create Draft
@@ -93,6 +105,7 @@ def render_triage_view(triage_service: TriageService, classifier: TaskClassifier
             with col_retry:
                 if st.button("🔄 Retry AI Analysis", use_container_width=True):
                     _clear_draft_state()
+                    st.session_state.force_fresh_analysis = True
                     st.rerun()
 
             with col_manual: